@@ -18,31 +18,86 @@ login_manager = LoginManager()
 def create_app():
     app = Flask(__name__)
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "tuned-up-dev-secret-change-in-production")
-    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///tunedup.db"
+    app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///tunedup.db")
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    app.config["USER_CACHE_TTL"] = int(os.environ.get("USER_CACHE_TTL", "30"))
+    app.config["PASSWORD_HASH_METHOD"] = os.environ.get("PASSWORD_HASH_METHOD", "scrypt")
+    app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+    app.config["PASSWORD_HASH_QUEUE_SIZE"] = int(os.environ.get("PASSWORD_HASH_QUEUE_SIZE", "4"))
+    app.config["ADMIN_USERNAMES"] = {
+        name.strip() for name in os.environ.get("ADMIN_USERNAMES", "").split(",") if name.strip()
+    }
+    app.config["PROFILE_DIR"] = os.environ.get("PROFILE_DIR")
+    app.config["LEADERBOARD_MIN_LISTS"] = int(os.environ.get("LEADERBOARD_MIN_LISTS", "3"))
+    app.config["SIMILARITY_INDEX_TTL"] = int(os.environ.get("SIMILARITY_INDEX_TTL", "60"))
+    app.config["HISTORY_CHECKPOINT_EVERY"] = int(os.environ.get("HISTORY_CHECKPOINT_EVERY", "50"))
+    app.config["HISTORY_RETENTION_DAYS"] = int(os.environ.get("HISTORY_RETENTION_DAYS", "90"))
+    app.config["ASSETS_DIR"] = os.environ.get("ASSETS_DIR")
+    app.config["COMPRESS_MIN_SIZE"] = int(os.environ.get("COMPRESS_MIN_SIZE", "2048"))
+    app.config["EVENTS_MAX_STREAMS_PER_USER"] = int(os.environ.get("EVENTS_MAX_STREAMS_PER_USER", "5"))
+    app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "").lower() in ("1", "true", "yes")
 
     db.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = "auth.login"
     login_manager.login_message = "Please log in to continue."
 
-    from app.models import User
+    from app.identity import init_identity_cache, load_identity
+
+    init_identity_cache(app)
 
     @login_manager.user_loader
     def load_user(user_id):
-        return db.session.get(User, int(user_id))
+        return load_identity(user_id)
+
+    from app.profiling import request_profiler
+    request_profiler.init_app(app)
+
+    from app.similarity import init_similarity
+    init_similarity(app)
+
+    from app.events import init_events
+    init_events(app)
 
-    from app.routes import main, auth, artists, albums, songs, spotify_api
+    from app.routes import main, auth, artists, albums, songs, spotify_api, admin, leaderboards, similar, history, events
     app.register_blueprint(main.bp)
     app.register_blueprint(auth.bp, url_prefix="/auth")
     app.register_blueprint(artists.bp, url_prefix="/api/artists")
     app.register_blueprint(albums.bp, url_prefix="/api/albums")
     app.register_blueprint(songs.bp, url_prefix="/api/songs")
     app.register_blueprint(spotify_api.bp, url_prefix="/api/spotify")
+    app.register_blueprint(leaderboards.bp, url_prefix="/api/leaderboards")
+    app.register_blueprint(similar.bp, url_prefix="/api/similar")
+    app.register_blueprint(history.bp, url_prefix="/api/history")
+    app.register_blueprint(events.bp, url_prefix="/api/events")
+    app.register_blueprint(admin.bp, url_prefix="/admin")
 
     with app.app_context():
         db.create_all()
         _add_spotify_columns_if_missing(app)
+        from app.leaderboards import backfill_if_empty
+        backfill_if_empty()
+
+    @app.cli.command("recompute-leaderboards")
+    def recompute_leaderboards():
+        """Rebuild leaderboard aggregates from the ranking tables."""
+        from app.leaderboards import recompute
+        recompute()
+        print("Leaderboards recomputed.")
+
+    @app.cli.command("compact-history")
+    def compact_history():
+        """Drop ranking history older than HISTORY_RETENTION_DAYS."""
+        from app.history import compact
+        print(f"Removed {compact()} old history versions.")
+
+    from app.assets import init_assets
+    from app.compression import init_compression
+    init_assets(app)
+    init_compression(app)
+
+    from app.metrics import init_metrics
+    init_metrics(app)
 
     return app
 
@@ -0,0 +1,149 @@
+"""
+Static asset pipeline: content-hash fingerprinted copies of app/static files with gzip and
+brotli variants built ahead of time, served from /assets/ with immutable caching.
+
+`flask build-assets` writes everything plus manifest.json to ASSETS_DIR (default
+instance/assets). create_app rebuilds automatically when a source file is newer than the
+manifest. Templates call asset_url("app.js"), which falls back to the plain static URL
+for files that aren't in the manifest.
+"""
+import hashlib
+import json
+import mimetypes
+import os
+import threading
+
+from flask import Blueprint, abort, current_app, send_file, url_for
+
+from app.compression import available_encodings, compress, decompress, negotiate
+
+MANIFEST = "manifest.json"
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+EXTENSIONS = {"br": ".br", "gzip": ".gz"}
+
+bp = Blueprint("assets", __name__)
+
+_manifest = {}
+
+
+def _sources(static_folder):
+    for name in sorted(os.listdir(static_folder)):
+        path = os.path.join(static_folder, name)
+        if not name.startswith(".") and os.path.isfile(path):
+            yield name, path
+
+
+def _write_atomic(path, data):
+    """Write via a temp file and rename, so readers (and other workers building at the same
+    time) only ever see a complete file."""
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _is_built(target, data):
+    """True if target and every compressed variant exist and decode to data."""
+    try:
+        with open(target, "rb") as f:
+            if f.read() != data:
+                return False
+        for encoding in available_encodings():
+            with open(target + EXTENSIONS[encoding], "rb") as f:
+                if decompress(f.read(), encoding) != data:
+                    return False
+    except Exception:  # missing, or a truncated variant that fails to decode
+        return False
+    return True
+
+
+def build_assets(static_folder, out_dir):
+    """Write fingerprinted files and their compressed variants; return the manifest."""
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {}
+    for name, path in _sources(static_folder):
+        with open(path, "rb") as f:
+            data = f.read()
+        stem, ext = os.path.splitext(name)
+        fingerprinted = f"{stem}.{hashlib.sha256(data).hexdigest()[:12]}{ext}"
+        manifest[name] = fingerprinted
+        target = os.path.join(out_dir, fingerprinted)
+        if _is_built(target, data):
+            continue
+        _write_atomic(target, data)
+        for encoding in available_encodings():
+            _write_atomic(target + EXTENSIONS[encoding], compress(data, encoding, static=True))
+    _write_atomic(os.path.join(out_dir, MANIFEST), json.dumps(manifest, indent=2, sort_keys=True).encode())
+    return manifest
+
+
+def _needs_build(static_folder, out_dir):
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    if not os.path.exists(manifest_path):
+        return True
+    built = os.path.getmtime(manifest_path)
+    return any(os.path.getmtime(path) > built for _, path in _sources(static_folder))
+
+
+def _load_manifest(out_dir):
+    try:
+        with open(os.path.join(out_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def asset_url(filename):
+    fingerprinted = _manifest.get(filename)
+    if fingerprinted is None:
+        return url_for("static", filename=filename)
+    return url_for("assets.serve", filename=fingerprinted)
+
+
+@bp.route("/<path:filename>")
+def serve(filename):
+    """Serve a fingerprinted asset, pre-compressed when the client accepts it."""
+    if filename not in _manifest.values():
+        abort(404)
+    out_dir = current_app.config["ASSETS_DIR"]
+    path = os.path.join(out_dir, filename)
+    encodings = [e for e in available_encodings() if os.path.exists(path + EXTENSIONS[e])]
+    encoding = negotiate(encodings) if encodings else None
+    mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    if not os.path.exists(path):
+        abort(404)  # listed in the manifest but deleted or not deployed
+    if encoding:
+        response = send_file(path + EXTENSIONS[encoding], mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+        response.headers["Content-Encoding"] = encoding
+    else:
+        response = send_file(path, mimetype=mimetype, max_age=IMMUTABLE_MAX_AGE)
+    response.vary.add("Accept-Encoding")
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    global _manifest
+    # Absolute, so writes (relative to the working directory) and send_file (relative to
+    # app.root_path) agree on where the files are.
+    out_dir = os.path.abspath(app.config.get("ASSETS_DIR") or os.path.join(app.instance_path, "assets"))
+    app.config["ASSETS_DIR"] = out_dir
+    if _needs_build(app.static_folder, out_dir):
+        _manifest = build_assets(app.static_folder, out_dir)
+    else:
+        _manifest = _load_manifest(out_dir)
+    app.jinja_env.globals["asset_url"] = asset_url
+    app.register_blueprint(bp, url_prefix="/assets")
+
+    @app.cli.command("build-assets")
+    def build_assets_command():
+        """Fingerprint and pre-compress static assets."""
+        global _manifest
+        _manifest = build_assets(app.static_folder, out_dir)
+        for name, fingerprinted in sorted(_manifest.items()):
+            print(f"{name} -> {fingerprinted}")
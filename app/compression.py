@@ -0,0 +1,73 @@
+"""
+Response compression helpers: gzip/brotli encoders and an after_request hook that compresses
+large JSON API responses for clients that accept it.
+
+brotli is optional; without it only gzip is offered.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+DEFAULT_MIN_SIZE = 2048
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def compress(data, encoding, static=False):
+    """Compress bytes. static=True uses the slow maximum settings meant for build time."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else 5)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def decompress(data, encoding):
+    if encoding == "br":
+        return brotli.decompress(data)
+    if encoding == "gzip":
+        return gzip.decompress(data)
+    raise ValueError(f"Unsupported encoding: {encoding}")
+
+
+def negotiate(encodings):
+    """Best encoding from encodings that the client accepts, or None."""
+    accepted = request.accept_encodings
+    best = accepted.best_match(encodings)
+    if best and accepted[best] > 0:
+        return best
+    return None
+
+
+def init_compression(app):
+    min_size = app.config.get("COMPRESS_MIN_SIZE", DEFAULT_MIN_SIZE)
+    if not min_size or min_size <= 0:
+        return
+
+    @app.after_request
+    def compress_json(response):
+        if (
+            response.mimetype != "application/json"
+            or response.direct_passthrough
+            or response.status_code < 200
+            or response.status_code >= 300
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        data = response.get_data()
+        if len(data) < min_size:
+            return response
+        encoding = negotiate(available_encodings())
+        if encoding is None:
+            return response
+        response.set_data(compress(data, encoding))
+        response.headers["Content-Encoding"] = encoding
+        return response
@@ -0,0 +1,140 @@
+"""
+Per-user live change events, delivered to open dashboards over Server-Sent Events.
+
+Ranking routes publish a small event after each commit: {"kind", "type", "version", ...}.
+Each user's channel keeps the last few events so a reconnecting EventSource (which sends
+Last-Event-ID) can catch up; if it missed more than that, or the server restarted, it
+gets a "resync" event and reloads its lists.
+
+Beyond EVENTS_MAX_STREAMS_PER_USER the oldest stream is sent a final "evicted" event carrying
+a retry delay. The client closes its EventSource and reconnects only after that delay (backing
+off if it is evicted again), resuming from its last event id. The delay is longer than
+HEARTBEAT_SEC, so by then streams of tabs that were closed or reloaded have failed a heartbeat
+write and unsubscribed; a live device is only pushed out for a while, not for good.
+
+The broker is in-process. A stream is a generator blocked on a queue, so it holds no
+request context or DB connection while idle. Run with threaded or gevent workers so idle
+streams don't each occupy a worker process.
+"""
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+DEFAULT_BACKLOG = 50
+DEFAULT_MAX_STREAMS_PER_USER = 5
+HEARTBEAT_SEC = 25
+RETRY_MS = 3000
+EVICTED_RETRY_MS = 2 * HEARTBEAT_SEC * 1000
+
+_CLOSE = object()
+
+
+class _Channel:
+    __slots__ = ("seq", "backlog", "subscribers")
+
+    def __init__(self, backlog):
+        self.seq = 0
+        self.backlog = deque(maxlen=backlog)
+        self.subscribers = deque()
+
+
+class EventBroker:
+    def __init__(self, backlog=DEFAULT_BACKLOG, max_streams_per_user=DEFAULT_MAX_STREAMS_PER_USER):
+        self.backlog = backlog
+        self.max_streams_per_user = max_streams_per_user
+        # Event ids are "<epoch>-<seq>"; a different epoch means the client saw another process.
+        self.epoch = f"{os.getpid():x}{int(time.time()):x}"
+        self._channels = {}
+        self._lock = threading.Lock()
+
+    def publish(self, user_id, event):
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                return  # never subscribed in this process, so nobody could replay it
+            channel.seq += 1
+            entry = (f"{self.epoch}-{channel.seq}", json.dumps(event, separators=(",", ":")))
+            channel.backlog.append(entry)
+            subscribers = list(channel.subscribers)
+        for q in subscribers:
+            q.put(entry)
+
+    def subscribe(self, user_id, last_event_id=None):
+        """
+        Register a stream. Returns (queue, replay), where replay is the list of missed events,
+        or None if the client must resync because they are no longer available.
+        """
+        q = queue.SimpleQueue()
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                channel = self._channels[user_id] = _Channel(self.backlog)
+            channel.subscribers.append(q)
+            while len(channel.subscribers) > self.max_streams_per_user:
+                channel.subscribers.popleft().put(_CLOSE)
+            replay = self._replay(channel, last_event_id)
+        return q, replay
+
+    def _replay(self, channel, last_event_id):
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        seq = int(seq)
+        if seq >= channel.seq:
+            return []
+        oldest = channel.seq - len(channel.backlog) + 1
+        if seq + 1 < oldest:
+            return None
+        return list(channel.backlog)[seq + 1 - oldest:]
+
+    def unsubscribe(self, user_id, q):
+        with self._lock:
+            channel = self._channels.get(user_id)
+            if channel is None:
+                return
+            try:
+                channel.subscribers.remove(q)
+            except ValueError:
+                pass
+
+    def stream(self, user_id, last_event_id=None):
+        """Generator of SSE-formatted text for one connection."""
+        q, replay = self.subscribe(user_id, last_event_id)
+        try:
+            yield f"retry: {RETRY_MS}\n\n"
+            if replay is None:
+                yield "event: resync\ndata: {}\n\n"
+            else:
+                for event_id, data in replay:
+                    yield f"id: {event_id}\ndata: {data}\n\n"
+            while True:
+                try:
+                    entry = q.get(timeout=HEARTBEAT_SEC)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                if entry is _CLOSE:
+                    yield f'event: evicted\ndata: {{"retry_ms":{EVICTED_RETRY_MS}}}\n\n'
+                    return
+                event_id, data = entry
+                yield f"id: {event_id}\ndata: {data}\n\n"
+        finally:
+            self.unsubscribe(user_id, q)
+
+
+broker = EventBroker()
+
+
+def publish_change(user_id, kind, change, version, **data):
+    """Publish a ranking change ("add", "remove" or "reorder") for kind at list version."""
+    broker.publish(user_id, dict(kind=kind, type=change, version=version, **data))
+
+
+def init_events(app):
+    broker.backlog = app.config.get("EVENTS_BACKLOG", DEFAULT_BACKLOG)
+    broker.max_streams_per_user = app.config.get("EVENTS_MAX_STREAMS_PER_USER", DEFAULT_MAX_STREAMS_PER_USER)
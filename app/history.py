@@ -0,0 +1,228 @@
+"""
+Ranking history: every change to a list is stored as a new version holding either a compact
+delta or, every HISTORY_CHECKPOINT_EVERY versions, a full checkpoint of the list.
+
+Deltas are JSON lists of ops on 0-based indices, applied in order:
+    ["i", index, name]   insert name at index
+    ["r", index]         remove the item at index
+    ["m", from, to]      pop the item at from, insert it at to
+Reorders keep the longest run of items already in order and move only the rest.
+
+Reconstructing a version loads the nearest checkpoint at or before it and replays the
+deltas after it. compact() drops versions older than HISTORY_RETENTION_DAYS, turning the
+oldest kept version into a checkpoint.
+"""
+import json
+import time
+from bisect import bisect_left
+
+from flask import current_app
+
+from app import db
+from app.leaderboards import RANKING_MODELS
+from app.models import RankingHistory
+
+DEFAULT_CHECKPOINT_EVERY = 50
+DEFAULT_RETENTION_DAYS = 90
+
+
+class VersionConflict(Exception):
+    """The list's version no longer matches the client's If-Match."""
+
+
+def _dumps(value):
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def apply_ops(state, ops):
+    """Apply delta ops to a list of names in place and return it."""
+    for op in ops:
+        if op[0] == "i":
+            state.insert(op[1], op[2])
+        elif op[0] == "r":
+            del state[op[1]]
+        elif op[0] == "m":
+            state.insert(op[2], state.pop(op[1]))
+    return state
+
+
+def _longest_increasing(values):
+    """Indices into values of one longest strictly increasing subsequence."""
+    tails, tail_idx, prev = [], [], [None] * len(values)
+    for i, v in enumerate(values):
+        j = bisect_left(tails, v)
+        if j == len(tails):
+            tails.append(v)
+            tail_idx.append(i)
+        else:
+            tails[j] = v
+            tail_idx[j] = i
+        prev[i] = tail_idx[j - 1] if j else None
+    out, i = [], tail_idx[-1] if tail_idx else None
+    while i is not None:
+        out.append(i)
+        i = prev[i]
+    return out[::-1]
+
+
+def diff(old, new):
+    """Ops turning list old into list new (names are unique within a list)."""
+    new_set = set(new)
+    old_set = set(old)
+    ops = []
+    state = list(old)
+    # Removals, right to left so earlier indices stay valid.
+    for i in range(len(state) - 1, -1, -1):
+        if state[i] not in new_set:
+            ops.append(["r", i])
+            del state[i]
+    # Moves: keep the longest subsequence already in new's order, move each other item to just
+    # after its predecessor in new. Processing in new's order keeps everything placed so far
+    # (plus the kept run) in new's relative order.
+    common = [name for name in new if name in old_set]
+    old_index = {name: i for i, name in enumerate(state)}
+    keep = {common[i] for i in _longest_increasing([old_index[name] for name in common])}
+    for j, name in enumerate(common):
+        if name in keep:
+            continue
+        src = state.index(name)
+        state.pop(src)
+        dst = state.index(common[j - 1]) + 1 if j else 0
+        state.insert(dst, name)
+        ops.append(["m", src, dst])
+    # Inserts, left to right: everything before index i is already new[:i].
+    for i, name in enumerate(new):
+        if name not in old_set:
+            ops.append(["i", i, name])
+            state.insert(i, name)
+    return ops
+
+
+def ordered_names(rankings, column):
+    """Names of ranking rows in list order."""
+    return [getattr(r, column) for r in sorted(rankings, key=lambda r: (r.rank_position, r.id))]
+
+
+def current_names(kind, user_id):
+    model, column = RANKING_MODELS[kind]
+    rows = (
+        db.session.query(getattr(model, column))
+        .filter(model.user_id == user_id)
+        .order_by(model.rank_position, model.id)
+    )
+    return [name for (name,) in rows]
+
+
+def list_length(kind, user_id):
+    model, _ = RANKING_MODELS[kind]
+    return db.session.query(db.func.count(model.id)).filter(model.user_id == user_id).scalar()
+
+
+def record(kind, user_id, ops, if_match=None):
+    """
+    Append a version for a change described by ops and return the list's new version. Call
+    after the change is applied to the session (before commit); the caller commits. Writes a
+    checkpoint instead of a delta for the first version and every HISTORY_CHECKPOINT_EVERY
+    versions. Empty ops record nothing and return the current version.
+
+    if_match is the request's If-Match ETags. The version is read after autoflush has written
+    the change, so on SQLite this transaction already holds the write lock and no other write
+    can land between the check and the commit; raises VersionConflict if it doesn't match.
+    """
+    latest = latest_version(kind, user_id)
+    if if_match and not if_match.contains(etag(latest)):
+        raise VersionConflict(latest)
+    if not ops:
+        return latest
+    every = current_app.config.get("HISTORY_CHECKPOINT_EVERY", DEFAULT_CHECKPOINT_EVERY)
+    version = latest + 1
+    checkpoint = latest == 0 or version % max(1, every) == 0
+    payload = current_names(kind, user_id) if checkpoint else ops
+    db.session.add(RankingHistory(
+        user_id=user_id,
+        kind=kind,
+        version=version,
+        created_at=int(time.time()),
+        is_checkpoint=checkpoint,
+        payload=_dumps(payload),
+    ))
+    return version
+
+
+def etag(version):
+    return f"v{version}"
+
+
+def latest_version(kind, user_id):
+    """Current version of a list (0 before its first recorded change); used as its ETag."""
+    return (
+        db.session.query(db.func.max(RankingHistory.version))
+        .filter_by(user_id=user_id, kind=kind)
+        .scalar()
+    ) or 0
+
+
+def versions(kind, user_id):
+    rows = (
+        db.session.query(RankingHistory.version, RankingHistory.created_at, RankingHistory.is_checkpoint)
+        .filter_by(user_id=user_id, kind=kind)
+        .order_by(RankingHistory.version.desc())
+    )
+    return [{"version": v, "created_at": t, "checkpoint": bool(c)} for v, t, c in rows]
+
+
+def state_at(kind, user_id, version):
+    """The list as it was at version, or None if that version isn't retained."""
+    checkpoint = (
+        RankingHistory.query.filter_by(user_id=user_id, kind=kind, is_checkpoint=True)
+        .filter(RankingHistory.version <= version)
+        .order_by(RankingHistory.version.desc())
+        .first()
+    )
+    if checkpoint is None:
+        return None
+    state = json.loads(checkpoint.payload)
+    deltas = (
+        db.session.query(RankingHistory.version, RankingHistory.payload)
+        .filter_by(user_id=user_id, kind=kind)
+        .filter(RankingHistory.version > checkpoint.version, RankingHistory.version <= version)
+        .order_by(RankingHistory.version)
+    )
+    found = checkpoint.version
+    for v, payload in deltas:
+        apply_ops(state, json.loads(payload))
+        found = v
+    return state if found == version else None
+
+
+def compact(retention_days=None, now=None):
+    """Drop versions older than the retention window. Returns the number of rows deleted."""
+    if retention_days is None:
+        retention_days = current_app.config.get("HISTORY_RETENTION_DAYS", DEFAULT_RETENTION_DAYS)
+    if not retention_days or retention_days <= 0:
+        return 0
+    cutoff = int(now if now is not None else time.time()) - int(retention_days * 86400)
+    deleted = 0
+    expired = (
+        db.session.query(RankingHistory.user_id, RankingHistory.kind)
+        .filter(RankingHistory.created_at < cutoff)
+        .distinct()
+        .all()
+    )
+    for user_id, kind in expired:
+        entries = RankingHistory.query.filter_by(user_id=user_id, kind=kind)
+        first_kept = (
+            entries.filter(RankingHistory.created_at >= cutoff).order_by(RankingHistory.version).first()
+        )
+        if first_kept is None:
+            # Everything is old: keep only the latest version, as a checkpoint.
+            first_kept = entries.order_by(RankingHistory.version.desc()).first()
+        if not first_kept.is_checkpoint:
+            state = state_at(kind, user_id, first_kept.version)
+            if state is None:
+                continue
+            first_kept.payload = _dumps(state)
+            first_kept.is_checkpoint = True
+        deleted += entries.filter(RankingHistory.version < first_kept.version).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
@@ -0,0 +1,119 @@
+"""
+Short-lived cache of the identity Flask-Login needs on every request.
+
+load_user only needs the user's id and username, so it queries just those columns and
+keeps the result for a few seconds. Routes that need tokens or other columns load the full
+row with load_current_user().
+
+Eviction on write only reaches the process that made the write, so with several worker
+processes another worker may serve a cached identity for up to USER_CACHE_TTL. Only
+fields that don't change after sign-up are cached for that reason; anything mutable (such
+as whether Spotify is connected) is read fresh from the row.
+"""
+import threading
+import time
+
+from flask_login import UserMixin, current_user
+from sqlalchemy import event
+
+from app import db
+
+DEFAULT_TTL_SEC = 30
+DEFAULT_MAX_SIZE = 10000
+
+
+class CachedUser(UserMixin):
+    """Minimal identity used as current_user. Not an ORM object; never attach it to a session."""
+
+    def __init__(self, id, username):
+        self.id = id
+        self.username = username
+
+
+class IdentityCache:
+    """Thread-safe TTL cache of CachedUser keyed by user id."""
+
+    def __init__(self, ttl=DEFAULT_TTL_SEC, max_size=DEFAULT_MAX_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires_at, identity = entry
+            if expires_at < time.monotonic():
+                del self._entries[user_id]
+                return None
+            return identity
+
+    def put(self, identity):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if len(self._entries) >= self.max_size:
+                # Drop expired entries first; if still full, start over rather than track LRU order.
+                now = time.monotonic()
+                self._entries = {k: v for k, v in self._entries.items() if v[0] >= now}
+                if len(self._entries) >= self.max_size:
+                    self._entries.clear()
+            self._entries[identity.id] = (time.monotonic() + self.ttl, identity)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+identity_cache = IdentityCache()
+
+
+def load_identity(user_id):
+    """Return a CachedUser for user_id, or None if the user no longer exists."""
+    from app.models import User
+
+    user_id = int(user_id)
+    identity = identity_cache.get(user_id)
+    if identity is not None:
+        return identity
+    row = db.session.query(User.id, User.username).filter(User.id == user_id).first()
+    if row is None:
+        return None
+    identity = CachedUser(row[0], row[1])
+    identity_cache.put(identity)
+    return identity
+
+
+def load_current_user():
+    """Return the full User row for current_user (for Spotify tokens and other writes)."""
+    from app.models import User
+
+    if not current_user.is_authenticated:
+        return None
+    if isinstance(current_user._get_current_object(), User):
+        return current_user._get_current_object()
+    return db.session.get(User, current_user.id)
+
+
+def _invalidate_user(mapper, connection, target):
+    identity_cache.invalidate(target.id)
+
+
+def init_identity_cache(app):
+    """Configure the cache from app config and evict entries whenever a User row changes."""
+    from app.models import User
+
+    identity_cache.ttl = app.config.get("USER_CACHE_TTL", DEFAULT_TTL_SEC)
+    identity_cache.max_size = app.config.get("USER_CACHE_MAX_SIZE", DEFAULT_MAX_SIZE)
+    identity_cache.clear()
+    for name in ("after_update", "after_delete"):
+        if not event.contains(User, name, _invalidate_user):
+            event.listen(User, name, _invalidate_user)
@@ -0,0 +1,118 @@
+"""
+Cross-user leaderboards ("most ranked" and "best average rank") backed by ranking_aggregates.
+
+The ranking routes call apply_changes() with per-item deltas before they commit, so the
+aggregates move in the same transaction as the rankings. recompute() rebuilds everything
+from the ranking tables (startup backfill and the `flask recompute-leaderboards` command).
+"""
+from sqlalchemy import case, func
+from sqlalchemy.dialects.sqlite import insert
+
+from app import db
+from app.models import RankingAggregate, ArtistRanking, AlbumRanking, SongRanking
+
+RANKING_MODELS = {
+    "artists": (ArtistRanking, "artist_name"),
+    "albums": (AlbumRanking, "album_name"),
+    "songs": (SongRanking, "song_name"),
+}
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+
+def item_key(name):
+    return name.strip().casefold()
+
+
+def apply_changes(kind, changes):
+    """
+    Add (name, list_count_delta, rank_sum_delta) changes to the aggregates for kind.
+    Runs in the caller's session; the caller commits.
+    """
+    merged = {}
+    for name, count_delta, rank_delta in changes:
+        if not count_delta and not rank_delta:
+            continue
+        key = item_key(name)
+        entry = merged.setdefault(key, [name, 0, 0])
+        entry[1] += count_delta
+        entry[2] += rank_delta
+    if not merged:
+        return
+    rows = [
+        {
+            "kind": kind,
+            "item_key": key,
+            "name": name,
+            "list_count": count,
+            "rank_sum": ranks,
+            "avg_rank": ranks / count if count > 0 else 0.0,
+        }
+        for key, (name, count, ranks) in merged.items()
+    ]
+    stmt = insert(RankingAggregate)
+    new_count = RankingAggregate.list_count + stmt.excluded.list_count
+    new_sum = RankingAggregate.rank_sum + stmt.excluded.rank_sum
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["kind", "item_key"],
+        set_={
+            "list_count": new_count,
+            "rank_sum": new_sum,
+            "avg_rank": case((new_count > 0, new_sum * 1.0 / new_count), else_=0.0),
+        },
+    )
+    db.session.execute(stmt, rows)
+
+
+def top_by_count(kind, limit=DEFAULT_LIMIT):
+    """Items on the most users' lists (ties broken by better average rank)."""
+    rows = (
+        RankingAggregate.query.filter(RankingAggregate.kind == kind, RankingAggregate.list_count > 0)
+        .order_by(RankingAggregate.list_count.desc(), RankingAggregate.avg_rank)
+        .limit(limit)
+        .all()
+    )
+    return [_to_dict(r) for r in rows]
+
+
+def top_by_avg_rank(kind, limit=DEFAULT_LIMIT, min_lists=1):
+    """Items with the best (lowest) average position among those on at least min_lists lists."""
+    rows = (
+        RankingAggregate.query.filter(
+            RankingAggregate.kind == kind, RankingAggregate.list_count >= max(1, min_lists)
+        )
+        .order_by(RankingAggregate.avg_rank, RankingAggregate.list_count.desc())
+        .limit(limit)
+        .all()
+    )
+    return [_to_dict(r) for r in rows]
+
+
+def _to_dict(row):
+    return {
+        "name": row.name,
+        "list_count": row.list_count,
+        "avg_rank": round(row.avg_rank, 2),
+    }
+
+
+def recompute():
+    """Rebuild all aggregates from the ranking tables with one GROUP BY per kind."""
+    RankingAggregate.query.delete()
+    for kind, (model, column) in RANKING_MODELS.items():
+        name_col = getattr(model, column)
+        grouped = db.session.query(
+            func.min(name_col), func.count(model.id), func.sum(model.rank_position)
+        ).group_by(func.lower(func.trim(name_col)))
+        # SQLite's lower() is ASCII-only, so merge again on the Python case-folded key.
+        apply_changes(kind, [(name, count, ranks or 0) for name, count, ranks in grouped])
+    db.session.commit()
+
+
+def backfill_if_empty():
+    """Populate aggregates on first run against a database that already has rankings."""
+    if db.session.query(RankingAggregate.id).first() is not None:
+        return
+    if not any(db.session.query(model.id).first() for model, _ in RANKING_MODELS.values()):
+        return
+    recompute()
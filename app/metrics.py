@@ -0,0 +1,228 @@
+"""
+Opt-in request instrumentation: per-request timing, SQL query counts/time and outbound
+Spotify call latency. Exposed as Prometheus text on /metrics and as Server-Timing headers.
+
+Enable with METRICS_ENABLED=1. When disabled nothing is registered and the Spotify
+client's record call returns immediately.
+"""
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import g, request
+from sqlalchemy import event
+
+from app import db
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Stats for the request being handled. A ContextVar (not flask.g) so Spotify calls made in
+# worker threads started with contextvars.copy_context() are still attributed to it.
+_current_stats = ContextVar("tunedup_request_stats", default=None)
+
+
+class RequestStats:
+    """Counters accumulated while one request is handled."""
+
+    __slots__ = ("start", "sql_count", "sql_time", "spotify_count", "spotify_time", "_lock")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_count = 0
+        self.sql_time = 0.0
+        self.spotify_count = 0
+        self.spotify_time = 0.0
+        self._lock = threading.Lock()
+
+    def add_sql(self, elapsed):
+        with self._lock:
+            self.sql_count += 1
+            self.sql_time += elapsed
+
+    def add_spotify(self, elapsed):
+        with self._lock:
+            self.spotify_count += 1
+            self.spotify_time += elapsed
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values=(), amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for label_values, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, label_values)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._series.items())
+        bucket_labels = self.labels + ("le",)
+        for label_values, series in items:
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, label_values + (bound,))} {count}")
+            lines.append(f"{self.name}_bucket{_format_labels(bucket_labels, label_values + ('+Inf',))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, label_values)} {series[-2]:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, label_values)} {series[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.enabled = False
+        self.requests = Counter(
+            "tunedup_http_requests_total", "HTTP requests handled.", ("method", "endpoint", "status")
+        )
+        self.request_seconds = Histogram(
+            "tunedup_http_request_duration_seconds", "Time spent handling HTTP requests.", ("endpoint",)
+        )
+        self.db_queries = Counter("tunedup_db_queries_total", "SQL statements executed.", ("endpoint",))
+        self.db_seconds = Counter(
+            "tunedup_db_query_seconds_total", "Time spent executing SQL statements.", ("endpoint",)
+        )
+        self.db_queries_per_request = Histogram(
+            "tunedup_db_queries_per_request",
+            "SQL statements executed per HTTP request.",
+            ("endpoint",),
+            buckets=(0, 1, 2, 5, 10, 25, 50, 100, 250),
+        )
+        self.spotify_seconds = Histogram(
+            "tunedup_spotify_request_duration_seconds",
+            "Latency of outbound Spotify calls (Web API endpoints, and endpoint=\"token\" for OAuth token requests).",
+            ("endpoint", "status"),
+        )
+
+    def render(self):
+        lines = []
+        for metric in (
+            self.requests,
+            self.request_seconds,
+            self.db_queries,
+            self.db_seconds,
+            self.db_queries_per_request,
+            self.spotify_seconds,
+        ):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def record_spotify_call(endpoint, status, elapsed):
+    """Called by the Spotify client after every Web API or token endpoint call."""
+    if not registry.enabled:
+        return
+    registry.spotify_seconds.observe((endpoint, status), elapsed)
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add_spotify(elapsed)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("tunedup_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get("tunedup_query_start")
+    if not starts:
+        return
+    elapsed = time.perf_counter() - starts.pop()
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.add_sql(elapsed)
+
+
+def _before_request():
+    stats = RequestStats()
+    g.metrics_token = _current_stats.set(stats)
+    g.metrics_stats = stats
+
+
+def _after_request(response):
+    stats = getattr(g, "metrics_stats", None)
+    if stats is None:
+        return response
+    elapsed = time.perf_counter() - stats.start
+    endpoint = request.endpoint or "<unmatched>"
+    registry.requests.inc((request.method, endpoint, str(response.status_code)))
+    registry.request_seconds.observe((endpoint,), elapsed)
+    registry.db_queries.inc((endpoint,), stats.sql_count)
+    registry.db_seconds.inc((endpoint,), stats.sql_time)
+    registry.db_queries_per_request.observe((endpoint,), stats.sql_count)
+    timings = [
+        f"app;dur={elapsed * 1000:.1f}",
+        f'db;dur={stats.sql_time * 1000:.1f};desc="{stats.sql_count} queries"',
+    ]
+    if stats.spotify_count:
+        timings.append(f'spotify;dur={stats.spotify_time * 1000:.1f};desc="{stats.spotify_count} calls"')
+    response.headers.add("Server-Timing", ", ".join(timings))
+    return response
+
+
+def _teardown_request(exc):
+    token = g.pop("metrics_token", None)
+    g.pop("metrics_stats", None)
+    if token is not None:
+        _current_stats.reset(token)
+
+
+def init_metrics(app):
+    """Install request/SQL hooks and the /metrics endpoint if METRICS_ENABLED is set."""
+    if not app.config.get("METRICS_ENABLED"):
+        return
+    registry.enabled = True
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+
+    from app.routes import metrics
+    app.register_blueprint(metrics.bp)
@@ -1,6 +1,6 @@
 from flask_login import UserMixin
-from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.passwords import hash_password, verify_password, needs_rehash
 
 
 class User(UserMixin, db.Model):
@@ -23,11 +23,20 @@ class User(UserMixin, db.Model):
     spotify_access_token = db.Column(db.Text, nullable=True)
     spotify_token_expires_at = db.Column(db.BigInteger, nullable=True)
 
+    @property
+    def spotify_connected(self):
+        return bool(self.spotify_refresh_token)
+
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = hash_password(password)
 
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        """Verify password; on success, upgrade an outdated hash in place (caller commits)."""
+        if not verify_password(self.password_hash, password):
+            return False
+        if needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
 
 class ArtistRanking(db.Model):
@@ -58,3 +67,35 @@ class SongRanking(db.Model):
     rank_position = db.Column(db.Integer, nullable=False)
 
     __table_args__ = (db.UniqueConstraint("user_id", "song_name", name="uq_user_song"),)
+
+
+class RankingAggregate(db.Model):
+    """Cross-user totals per ranked item, kept current by the ranking routes (see app.leaderboards)."""
+    __tablename__ = "ranking_aggregates"
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(16), nullable=False)  # "artists", "albums" or "songs"
+    item_key = db.Column(db.String(300), nullable=False)  # case-folded name
+    name = db.Column(db.String(300), nullable=False)  # display name (first seen)
+    list_count = db.Column(db.Integer, nullable=False, default=0)
+    rank_sum = db.Column(db.Integer, nullable=False, default=0)
+    avg_rank = db.Column(db.Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        db.UniqueConstraint("kind", "item_key", name="uq_aggregate_kind_item"),
+        db.Index("ix_aggregate_kind_count", "kind", "list_count"),
+        db.Index("ix_aggregate_kind_avg", "kind", "avg_rank"),
+    )
+
+
+class RankingHistory(db.Model):
+    """One version of a user's list: a full checkpoint or a compact delta (see app.history)."""
+    __tablename__ = "ranking_history"
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    kind = db.Column(db.String(16), nullable=False)
+    version = db.Column(db.Integer, nullable=False)
+    created_at = db.Column(db.BigInteger, nullable=False)
+    is_checkpoint = db.Column(db.Boolean, nullable=False, default=False)
+    payload = db.Column(db.Text, nullable=False)  # JSON: list of names, or list of ops
+
+    __table_args__ = (db.UniqueConstraint("user_id", "kind", "version", name="uq_history_version"),)
@@ -0,0 +1,76 @@
+"""
+Password hashing: configurable werkzeug hash method, transparent rehash on login, and a
+small bounded thread pool.
+
+Hashing still holds the calling request thread until it finishes; the pool caps how many
+hashes run at once (PASSWORD_HASH_WORKERS) and how many more may wait for a turn
+(PASSWORD_HASH_QUEUE_SIZE). Logins beyond that fail immediately with PasswordHashBusy
+(answered with 503) instead of queueing, so a burst occupies at most workers + queue_size
+request threads and the rest stay free for other routes.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+
+DEFAULT_HASH_METHOD = "scrypt"
+DEFAULT_WORKERS = 2
+DEFAULT_QUEUE_SIZE = 4
+
+
+class PasswordHashBusy(RuntimeError):
+    """Raised when the hashing pool is saturated and the request should be retried later."""
+
+
+_executor = None
+_slots = None
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor, _slots
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                cfg = current_app.config
+                workers = cfg.get("PASSWORD_HASH_WORKERS", DEFAULT_WORKERS)
+                queue_size = cfg.get("PASSWORD_HASH_QUEUE_SIZE", DEFAULT_QUEUE_SIZE)
+                _slots = threading.BoundedSemaphore(workers + queue_size)
+                _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+    return _executor
+
+
+def _run(fn, *args):
+    """Run fn on the hashing pool and wait for it. Raises PasswordHashBusy at once if the pool is full."""
+    executor = _get_executor()
+    if not _slots.acquire(blocking=False):
+        raise PasswordHashBusy("Password hashing is busy")
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        _slots.release()
+
+
+def _hash_method():
+    return current_app.config.get("PASSWORD_HASH_METHOD", DEFAULT_HASH_METHOD)
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """The "method:params" prefix werkzeug writes for method (e.g. scrypt -> scrypt:32768:8:1)."""
+    return generate_password_hash("", method=method).split("$", 1)[0]
+
+
+def hash_password(password):
+    return _run(generate_password_hash, password, _hash_method())
+
+
+def verify_password(pwhash, password):
+    return _run(check_password_hash, pwhash, password)
+
+
+def needs_rehash(pwhash):
+    """True if pwhash was made with a different method or parameters than currently configured."""
+    return pwhash.split("$", 1)[0] != _method_prefix(_hash_method())
@@ -0,0 +1,307 @@
+"""
+On-demand profiling of production requests.
+
+An admin arms the profiler for the next N requests matching a route (Flask endpoint such as
+"artists.reorder" or URL rule such as "/api/artists/reorder"). Matching requests are profiled
+with cProfile (.pstats, for pstats/snakeviz) or a sampling profiler (.folded collapsed stacks,
+for flamegraph.pl/speedscope) and written to PROFILE_DIR.
+
+The armed target is a small JSON file in PROFILE_DIR, so every worker process sees it: each
+worker re-stats the file at most once a second and reloads it when its mtime changes. The N
+slots are claimed across processes by exclusively creating one marker file per slot. While
+nothing is armed the per-request cost is a clock read (plus that stat once a second).
+"""
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+from flask import g, request
+
+MODES = ("cprofile", "sampling")
+DEFAULT_SAMPLE_INTERVAL_SEC = 0.005
+MAX_REQUESTS = 100
+TARGET_FILE = "target.json"
+SLOTS_DIR = ".slots"
+TARGET_CHECK_INTERVAL_SEC = 1.0
+_CAPTURE_RE = re.compile(r"^(?P<stamp>\d{8}T\d{12}Z)-(?P<endpoint>.+)-(?P<ms>\d+)ms\.(?:pstats|folded)$")
+
+
+class ProfileTarget:
+    """What to profile and how many matching requests are left."""
+
+    def __init__(self, id, route, count, mode="cprofile", method=None, interval=DEFAULT_SAMPLE_INTERVAL_SEC):
+        self.id = id
+        self.route = route
+        self.count = count
+        self.mode = mode
+        self.method = method.upper() if method else None
+        self.interval = interval
+
+    def matches(self, req):
+        if self.method and req.method != self.method:
+            return False
+        rule = req.url_rule.rule if req.url_rule is not None else None
+        return self.route in (req.endpoint, rule)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "route": self.route,
+            "count": self.count,
+            "mode": self.mode,
+            "method": self.method,
+            "interval": self.interval,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["id"], data["route"], data["count"], data["mode"], data.get("method"), data["interval"])
+
+
+class SamplingProfiler:
+    """Samples one thread's stack at a fixed interval and aggregates collapsed stacks."""
+
+    def __init__(self, thread_id, interval):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            parts = []
+            while frame is not None:
+                code = frame.f_code
+                parts.append(f"{os.path.basename(code.co_filename)}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            key = ";".join(reversed(parts))
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            for stack, count in sorted(self.stacks.items()):
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    """Tracks the armed target (shared through PROFILE_DIR) and installs the request hooks."""
+
+    def __init__(self):
+        self.target = None
+        self.output_dir = None
+        self._target_mtime = None
+        self._checked_at = None
+        self._lock = threading.Lock()
+        self._cprofile_active = False
+
+    def init_app(self, app):
+        self.output_dir = app.config.get("PROFILE_DIR") or os.path.join(app.instance_path, "profiles")
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def _path(self, *parts):
+        return os.path.join(self.output_dir, *parts)
+
+    def _read_target(self):
+        try:
+            with open(self._path(TARGET_FILE)) as f:
+                return ProfileTarget.from_dict(json.load(f))
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def _clear_slots(self, keep_id=None):
+        try:
+            names = os.listdir(self._path(SLOTS_DIR))
+        except OSError:
+            return
+        for name in names:
+            if keep_id is None or not name.startswith(keep_id + "."):
+                try:
+                    os.remove(self._path(SLOTS_DIR, name))
+                except OSError:
+                    pass
+
+    def _claimed_slots(self, target):
+        try:
+            return sum(1 for name in os.listdir(self._path(SLOTS_DIR)) if name.startswith(target.id + "."))
+        except OSError:
+            return 0
+
+    def arm(self, route, count, mode="cprofile", method=None, interval=DEFAULT_SAMPLE_INTERVAL_SEC):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if not route:
+            raise ValueError("route is required")
+        if not 1 <= count <= MAX_REQUESTS:
+            raise ValueError(f"count must be between 1 and {MAX_REQUESTS}")
+        target = ProfileTarget(os.urandom(8).hex(), route, count, mode, method, interval)
+        os.makedirs(self._path(SLOTS_DIR), exist_ok=True)
+        tmp = self._path(f"{TARGET_FILE}.{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            json.dump(target.to_dict(), f)
+        os.replace(tmp, self._path(TARGET_FILE))
+        self._clear_slots(keep_id=target.id)
+        with self._lock:
+            self.target = target
+            self._target_mtime = os.stat(self._path(TARGET_FILE)).st_mtime_ns
+            self._checked_at = time.monotonic()
+        return dict(target.to_dict(), remaining=count)
+
+    def disarm(self):
+        try:
+            os.remove(self._path(TARGET_FILE))
+        except FileNotFoundError:
+            pass
+        self._clear_slots()
+        with self._lock:
+            self.target = None
+            self._checked_at = None
+
+    def status(self):
+        target = self._read_target()
+        if target is not None:
+            target = dict(target.to_dict(), remaining=max(0, target.count - self._claimed_slots(target)))
+        return {"target": target, "output_dir": self.output_dir, "captured": self.captured()}
+
+    def captured(self):
+        """The most recent profile files written by any worker, newest first."""
+        try:
+            names = sorted(os.listdir(self.output_dir), reverse=True)
+        except OSError:
+            return []
+        out = []
+        for name in names:
+            m = _CAPTURE_RE.match(name)
+            if m:
+                out.append({"file": self._path(name), "endpoint": m["endpoint"], "ms": int(m["ms"])})
+                if len(out) >= MAX_REQUESTS:
+                    break
+        return out
+
+    def _refresh(self):
+        """Reload the target if another worker armed or disarmed it (stat at most once a second)."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < TARGET_CHECK_INTERVAL_SEC:
+            return
+        self._checked_at = now
+        try:
+            mtime = os.stat(self._path(TARGET_FILE)).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._target_mtime:
+            return
+        target = self._read_target() if mtime is not None else None
+        with self._lock:
+            self.target = target
+            self._target_mtime = mtime
+
+    def _target_changed(self):
+        try:
+            mtime = os.stat(self._path(TARGET_FILE)).st_mtime_ns
+        except OSError:
+            mtime = None
+        return mtime != self._target_mtime
+
+    def _retire(self, target):
+        """Disarm after the last slot is taken, unless a newer target has been armed meanwhile."""
+        current = self._read_target()
+        if current is not None and current.id == target.id:
+            self.disarm()
+
+    def _claim_slot(self, target):
+        """Atomically take one of the target's slots across all workers; False when none are left."""
+        for k in range(target.count):
+            try:
+                fd = os.open(self._path(SLOTS_DIR, f"{target.id}.{k}"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                continue
+            except OSError:
+                return False
+            os.close(fd)
+            if self._target_changed():
+                # Disarmed or re-armed since this worker loaded it (its slots may have been cleared).
+                with self._lock:
+                    self._checked_at = None
+                return False
+            if k == target.count - 1:
+                self._retire(target)
+            return True
+        with self._lock:
+            if self.target is target:
+                self.target = None
+        return False
+
+    def _claim(self, req):
+        """Take one slot from the armed target if req matches; returns (mode, interval) or None."""
+        with self._lock:
+            target = self.target
+            if target is None or not target.matches(req):
+                return None
+            if target.mode == "cprofile":
+                # cProfile can only run one profiler at a time on newer Pythons; skip, don't count.
+                if self._cprofile_active:
+                    return None
+                self._cprofile_active = True
+        if not self._claim_slot(target):
+            if target.mode == "cprofile":
+                with self._lock:
+                    self._cprofile_active = False
+            return None
+        return target.mode, target.interval
+
+    def _before_request(self):
+        self._refresh()
+        if self.target is None:
+            return
+        claimed = self._claim(request)
+        if claimed is None:
+            return
+        mode, interval = claimed
+        if mode == "cprofile":
+            profiler = cProfile.Profile()
+            profiler.enable()
+        else:
+            profiler = SamplingProfiler(threading.get_ident(), interval)
+            profiler.start()
+        g.request_profiler = (mode, profiler, time.perf_counter())
+
+    def _teardown_request(self, exc):
+        state = g.pop("request_profiler", None)
+        if state is None:
+            return
+        mode, profiler, start = state
+        if mode == "cprofile":
+            profiler.disable()
+            with self._lock:
+                self._cprofile_active = False
+        else:
+            profiler.stop()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        os.makedirs(self.output_dir, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "_", request.endpoint or "unmatched")
+        ext = "pstats" if mode == "cprofile" else "folded"
+        path = self._path(f"{stamp}-{name}-{round(elapsed_ms)}ms.{ext}")
+        if mode == "cprofile":
+            profiler.dump_stats(path)
+        else:
+            profiler.dump(path)
+
+
+request_profiler = RequestProfiler()
@@ -1,3 +1,3 @@
-from app.routes import main, auth, artists, albums, songs, spotify_api
+from app.routes import main, auth, artists, albums, songs, spotify_api, metrics, admin, leaderboards, similar, history, events
 
-__all__ = ["main", "auth", "artists", "albums", "songs", "spotify_api"]
+__all__ = ["main", "auth", "artists", "albums", "songs", "spotify_api", "metrics", "admin", "leaderboards", "similar", "history", "events"]
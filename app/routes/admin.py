@@ -0,0 +1,57 @@
+"""
+Admin-only operational routes. Admins are listed by username in ADMIN_USERNAMES.
+"""
+from functools import wraps
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required, current_user
+from app.profiling import request_profiler, DEFAULT_SAMPLE_INTERVAL_SEC
+
+bp = Blueprint("admin", __name__)
+
+
+def admin_required(view):
+    @wraps(view)
+    @login_required
+    def wrapped(*args, **kwargs):
+        if current_user.username not in current_app.config.get("ADMIN_USERNAMES", ()):
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+    return wrapped
+
+
+@bp.route("/profile", methods=["GET"])
+@admin_required
+def profile_status():
+    """Return the armed profile target (if any) and profile files recently captured by any worker."""
+    return jsonify(request_profiler.status())
+
+
+@bp.route("/profile", methods=["POST"])
+@admin_required
+def arm_profile():
+    """
+    Profile the next N requests matching a route, across all worker processes sharing PROFILE_DIR.
+    Body: route (endpoint like "artists.reorder" or rule like "/api/artists/reorder"),
+    count (default 1), mode ("cprofile" or "sampling"), method (optional), interval_ms (sampling).
+    """
+    data = request.get_json() or {}
+    try:
+        count = int(data.get("count", 1))
+        interval = float(data.get("interval_ms", DEFAULT_SAMPLE_INTERVAL_SEC * 1000)) / 1000
+        target = request_profiler.arm(
+            (data.get("route") or "").strip(),
+            count,
+            mode=data.get("mode", "cprofile"),
+            method=data.get("method"),
+            interval=max(0.001, interval),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"target": target}), 201
+
+
+@bp.route("/profile", methods=["DELETE"])
+@admin_required
+def disarm_profile():
+    request_profiler.disarm()
+    return jsonify({"ok": True})
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from app import db
+from sqlalchemy.exc import IntegrityError
+from app import db, history, leaderboards
+from app.events import publish_change
+from app.similarity import similarity_engine
 from app.models import AlbumRanking
 
 bp = Blueprint("albums", __name__)
@@ -9,8 +12,12 @@ bp = Blueprint("albums", __name__)
 @bp.route("/", methods=["GET"])
 @login_required
 def list_rankings():
-    rankings = AlbumRanking.query.filter_by(user_id=current_user.id).order_by(AlbumRanking.rank_position).all()
-    return jsonify([{"id": r.id, "album_name": r.album_name, "rank_position": r.rank_position} for r in rankings])
+    rankings = (
+        AlbumRanking.query.filter_by(user_id=current_user.id).order_by(AlbumRanking.rank_position, AlbumRanking.id).all()
+    )
+    response = jsonify([{"id": r.id, "album_name": r.album_name, "rank_position": r.rank_position} for r in rankings])
+    response.set_etag(history.etag(history.latest_version("albums", current_user.id)))
+    return response
 
 
 @bp.route("/", methods=["POST"])
@@ -24,10 +31,19 @@ def add_album():
     if existing:
         return jsonify({"error": "Album already in your list"}), 400
     max_pos = db.session.query(db.func.max(AlbumRanking.rank_position)).filter_by(user_id=current_user.id).scalar() or 0
+    # New rows go last in (rank_position, id) order; history ops use list indices, not positions.
+    index = history.list_length("albums", current_user.id)
     ranking = AlbumRanking(user_id=current_user.id, album_name=name, rank_position=max_pos + 1)
     db.session.add(ranking)
+    leaderboards.apply_changes("albums", [(name, 1, ranking.rank_position)])
+    version = history.record("albums", current_user.id, [["i", index, name]])
     db.session.commit()
-    return jsonify({"id": ranking.id, "album_name": ranking.album_name, "rank_position": ranking.rank_position}), 201
+    similarity_engine.invalidate_user(current_user.id)
+    item = {"id": ranking.id, "album_name": ranking.album_name, "rank_position": ranking.rank_position}
+    publish_change(current_user.id, "albums", "add", version, item=item)
+    response = jsonify(item)
+    response.set_etag(history.etag(version))
+    return response, 201
 
 
 @bp.route("/reorder", methods=["PUT"])
@@ -38,11 +54,30 @@ def reorder():
     if not order or not isinstance(order, list):
         return jsonify({"error": "Order list is required"}), 400
     rankings = {r.id: r for r in AlbumRanking.query.filter_by(user_id=current_user.id).all()}
+    before = history.ordered_names(rankings.values(), "album_name")
+    changes = []
     for position, id_ in enumerate(order, start=1):
         if id_ in rankings:
-            rankings[id_].rank_position = position
-    db.session.commit()
-    return jsonify({"ok": True})
+            r = rankings[id_]
+            changes.append((r.album_name, 0, position - r.rank_position))
+            r.rank_position = position
+    leaderboards.apply_changes("albums", changes)
+    ops = history.diff(before, history.ordered_names(rankings.values(), "album_name"))
+    try:
+        # A client that sends If-Match with the version it last saw can't overwrite newer changes.
+        version = history.record("albums", current_user.id, ops, if_match=request.if_match)
+        db.session.commit()
+    except (history.VersionConflict, IntegrityError):
+        # IntegrityError: another write recorded this version number first, on a database
+        # that let both transactions read the same latest version.
+        db.session.rollback()
+        return jsonify({"error": "Your list changed elsewhere. Reload and try again."}), 412
+    similarity_engine.invalidate_user(current_user.id)
+    if ops:
+        publish_change(current_user.id, "albums", "reorder", version, ops=ops)
+    response = jsonify({"ok": True})
+    response.set_etag(history.etag(version))
+    return response
 
 
 @bp.route("/<int:album_id>", methods=["DELETE"])
@@ -52,8 +87,19 @@ def remove_album(album_id):
     if not ranking:
         return jsonify({"error": "Not found"}), 404
     old_pos = ranking.rank_position
+    # Diff the whole list: with tied positions the shift below can also reorder the remaining rows.
+    before = history.current_names("albums", current_user.id)
     db.session.delete(ranking)
+    changes = [(ranking.album_name, -1, -old_pos)]
     for r in AlbumRanking.query.filter_by(user_id=current_user.id).filter(AlbumRanking.rank_position > old_pos).all():
         r.rank_position -= 1
+        changes.append((r.album_name, 0, -1))
+    leaderboards.apply_changes("albums", changes)
+    ops = history.diff(before, history.current_names("albums", current_user.id))
+    version = history.record("albums", current_user.id, ops)
     db.session.commit()
-    return jsonify({"ok": True}), 200
+    similarity_engine.invalidate_user(current_user.id)
+    publish_change(current_user.id, "albums", "remove", version, id=album_id, ops=ops)
+    response = jsonify({"ok": True})
+    response.set_etag(history.etag(version))
+    return response, 200
@@ -1,7 +1,9 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request
 from flask_login import login_user, logout_user, current_user
 from app import db
+from app.identity import load_current_user
 from app.models import User
+from app.passwords import PasswordHashBusy
 from app.spotify_client import get_spotify_oauth, spotify_configured
 
 bp = Blueprint("auth", __name__)
@@ -25,7 +27,11 @@ def register():
             flash("That email is already registered.", "error")
             return render_template("register.html")
         user = User(username=username, email=email)
-        user.set_password(password)
+        try:
+            user.set_password(password)
+        except PasswordHashBusy:
+            flash("Too many sign-ups right now. Please try again in a moment.", "error")
+            return render_template("register.html"), 503
         db.session.add(user)
         db.session.commit()
         login_user(user)
@@ -42,7 +48,13 @@ def login():
         username = (request.form.get("username") or "").strip()
         password = request.form.get("password") or ""
         user = User.query.filter_by(username=username).first()
-        if user and user.check_password(password):
+        try:
+            ok = user is not None and user.check_password(password)
+        except PasswordHashBusy:
+            flash("Too many login attempts right now. Please try again in a moment.", "error")
+            return render_template("login.html"), 503
+        if ok:
+            db.session.commit()  # persists a transparent rehash, if any
             login_user(user)
             flash("Welcome back!", "success")
             next_url = request.args.get("next") or url_for("main.dashboard")
@@ -92,10 +104,11 @@ def spotify_callback():
         flash("Could not connect to Spotify.", "error")
         return redirect(url_for("main.dashboard"))
     if token_info:
-        current_user.spotify_refresh_token = token_info.get("refresh_token")
-        current_user.spotify_id = token_info.get("user_id")
-        current_user.spotify_access_token = token_info.get("access_token")
-        current_user.spotify_token_expires_at = token_info.get("expires_at")
+        user = load_current_user()
+        user.spotify_refresh_token = token_info.get("refresh_token")
+        user.spotify_id = token_info.get("user_id")
+        user.spotify_access_token = token_info.get("access_token")
+        user.spotify_token_expires_at = token_info.get("expires_at")
         db.session.commit()
         flash("Spotify connected. You can get personalized recommendations.", "success")
     else:
@@ -0,0 +1,24 @@
+"""
+Server-Sent Events stream of the current user's ranking changes.
+"""
+from flask import Blueprint, Response, request
+from flask_login import login_required, current_user
+from app.events import broker
+
+bp = Blueprint("events", __name__)
+
+
+@bp.route("/")
+@login_required
+def stream():
+    """
+    Long-lived text/event-stream; resumes from Last-Event-ID after a reconnect, or from the
+    last_event_id query parameter when the client opens a new EventSource after an eviction.
+    """
+    user_id = current_user.id
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+    return Response(
+        broker.stream(user_id, last_event_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,30 @@
+"""
+Past versions of the current user's ranking lists.
+"""
+from flask import Blueprint, jsonify
+from flask_login import login_required, current_user
+from app import history
+from app.leaderboards import RANKING_MODELS
+
+bp = Blueprint("history", __name__)
+
+
+@bp.route("/<kind>")
+@login_required
+def list_versions(kind):
+    """Retained versions of one list (artists, albums or songs), newest first."""
+    if kind not in RANKING_MODELS:
+        return jsonify({"error": "Not found"}), 404
+    return jsonify({"kind": kind, "versions": history.versions(kind, current_user.id)})
+
+
+@bp.route("/<kind>/<int:version>")
+@login_required
+def get_version(kind, version):
+    """The list as it was at a given version."""
+    if kind not in RANKING_MODELS:
+        return jsonify({"error": "Not found"}), 404
+    items = history.state_at(kind, current_user.id, version)
+    if items is None:
+        return jsonify({"error": "Version not found"}), 404
+    return jsonify({"kind": kind, "version": version, "items": items})
@@ -0,0 +1,31 @@
+"""
+Global leaderboards across all users, read from the precomputed ranking_aggregates table.
+"""
+from flask import Blueprint, request, jsonify, current_app
+from flask_login import login_required
+from app import leaderboards
+
+bp = Blueprint("leaderboards", __name__)
+
+
+@bp.route("/<kind>")
+@login_required
+def leaderboard(kind):
+    """
+    Top items of one kind (artists, albums or songs).
+    Query params: by ("count" for most ranked, "avg" for best average rank), limit (max 100).
+    """
+    if kind not in leaderboards.RANKING_MODELS:
+        return jsonify({"error": "Not found"}), 404
+    by = (request.args.get("by") or "count").lower()
+    try:
+        limit = min(leaderboards.MAX_LIMIT, max(1, int(request.args.get("limit", leaderboards.DEFAULT_LIMIT))))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+    if by == "count":
+        items = leaderboards.top_by_count(kind, limit)
+    elif by == "avg":
+        items = leaderboards.top_by_avg_rank(kind, limit, current_app.config.get("LEADERBOARD_MIN_LISTS", 1))
+    else:
+        return jsonify({"error": "by must be count or avg"}), 400
+    return jsonify({"kind": kind, "by": by, "items": items})
@@ -0,0 +1,12 @@
+"""
+Prometheus-style metrics endpoint. Only registered when METRICS_ENABLED is set.
+"""
+from flask import Blueprint, Response
+from app.metrics import registry
+
+bp = Blueprint("metrics", __name__)
+
+
+@bp.route("/metrics")
+def metrics():
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
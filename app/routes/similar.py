@@ -0,0 +1,25 @@
+"""
+"Users with similar taste" for the current user.
+"""
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+from app.similarity import similarity_engine, KINDS, ALL, DEFAULT_LIMIT, MAX_LIMIT
+
+bp = Blueprint("similar", __name__)
+
+
+@bp.route("/")
+@login_required
+def similar_users():
+    """
+    Users whose rankings best match the current user's.
+    Query params: kind (all, artists, albums or songs), limit (max 50).
+    """
+    kind = (request.args.get("kind") or ALL).lower()
+    if kind != ALL and kind not in KINDS:
+        return jsonify({"error": "kind must be all, artists, albums or songs"}), 400
+    try:
+        limit = min(MAX_LIMIT, max(1, int(request.args.get("limit", DEFAULT_LIMIT))))
+    except ValueError:
+        return jsonify({"error": "limit must be a number"}), 400
+    return jsonify({"kind": kind, "users": similarity_engine.similar_users(current_user.id, kind, limit)})
@@ -1,6 +1,9 @@
 from flask import Blueprint, request, jsonify
 from flask_login import login_required, current_user
-from app import db
+from sqlalchemy.exc import IntegrityError
+from app import db, history, leaderboards
+from app.events import publish_change
+from app.similarity import similarity_engine
 from app.models import SongRanking
 
 bp = Blueprint("songs", __name__)
@@ -9,8 +12,12 @@ bp = Blueprint("songs", __name__)
 @bp.route("/", methods=["GET"])
 @login_required
 def list_rankings():
-    rankings = SongRanking.query.filter_by(user_id=current_user.id).order_by(SongRanking.rank_position).all()
-    return jsonify([{"id": r.id, "song_name": r.song_name, "rank_position": r.rank_position} for r in rankings])
+    rankings = (
+        SongRanking.query.filter_by(user_id=current_user.id).order_by(SongRanking.rank_position, SongRanking.id).all()
+    )
+    response = jsonify([{"id": r.id, "song_name": r.song_name, "rank_position": r.rank_position} for r in rankings])
+    response.set_etag(history.etag(history.latest_version("songs", current_user.id)))
+    return response
 
 
 @bp.route("/", methods=["POST"])
@@ -24,10 +31,19 @@ def add_song():
     if existing:
         return jsonify({"error": "Song already in your list"}), 400
     max_pos = db.session.query(db.func.max(SongRanking.rank_position)).filter_by(user_id=current_user.id).scalar() or 0
+    # New rows go last in (rank_position, id) order; history ops use list indices, not positions.
+    index = history.list_length("songs", current_user.id)
     ranking = SongRanking(user_id=current_user.id, song_name=name, rank_position=max_pos + 1)
     db.session.add(ranking)
+    leaderboards.apply_changes("songs", [(name, 1, ranking.rank_position)])
+    version = history.record("songs", current_user.id, [["i", index, name]])
     db.session.commit()
-    return jsonify({"id": ranking.id, "song_name": ranking.song_name, "rank_position": ranking.rank_position}), 201
+    similarity_engine.invalidate_user(current_user.id)
+    item = {"id": ranking.id, "song_name": ranking.song_name, "rank_position": ranking.rank_position}
+    publish_change(current_user.id, "songs", "add", version, item=item)
+    response = jsonify(item)
+    response.set_etag(history.etag(version))
+    return response, 201
 
 
 @bp.route("/reorder", methods=["PUT"])
@@ -38,11 +54,30 @@ def reorder():
     if not order or not isinstance(order, list):
         return jsonify({"error": "Order list is required"}), 400
     rankings = {r.id: r for r in SongRanking.query.filter_by(user_id=current_user.id).all()}
+    before = history.ordered_names(rankings.values(), "song_name")
+    changes = []
     for position, id_ in enumerate(order, start=1):
         if id_ in rankings:
-            rankings[id_].rank_position = position
-    db.session.commit()
-    return jsonify({"ok": True})
+            r = rankings[id_]
+            changes.append((r.song_name, 0, position - r.rank_position))
+            r.rank_position = position
+    leaderboards.apply_changes("songs", changes)
+    ops = history.diff(before, history.ordered_names(rankings.values(), "song_name"))
+    try:
+        # A client that sends If-Match with the version it last saw can't overwrite newer changes.
+        version = history.record("songs", current_user.id, ops, if_match=request.if_match)
+        db.session.commit()
+    except (history.VersionConflict, IntegrityError):
+        # IntegrityError: another write recorded this version number first, on a database
+        # that let both transactions read the same latest version.
+        db.session.rollback()
+        return jsonify({"error": "Your list changed elsewhere. Reload and try again."}), 412
+    similarity_engine.invalidate_user(current_user.id)
+    if ops:
+        publish_change(current_user.id, "songs", "reorder", version, ops=ops)
+    response = jsonify({"ok": True})
+    response.set_etag(history.etag(version))
+    return response
 
 
 @bp.route("/<int:song_id>", methods=["DELETE"])
@@ -52,8 +87,19 @@ def remove_song(song_id):
     if not ranking:
         return jsonify({"error": "Not found"}), 404
     old_pos = ranking.rank_position
+    # Diff the whole list: with tied positions the shift below can also reorder the remaining rows.
+    before = history.current_names("songs", current_user.id)
     db.session.delete(ranking)
+    changes = [(ranking.song_name, -1, -old_pos)]
     for r in SongRanking.query.filter_by(user_id=current_user.id).filter(SongRanking.rank_position > old_pos).all():
         r.rank_position -= 1
+        changes.append((r.song_name, 0, -1))
+    leaderboards.apply_changes("songs", changes)
+    ops = history.diff(before, history.current_names("songs", current_user.id))
+    version = history.record("songs", current_user.id, ops)
     db.session.commit()
-    return jsonify({"ok": True}), 200
+    similarity_engine.invalidate_user(current_user.id)
+    publish_change(current_user.id, "songs", "remove", version, id=song_id, ops=ops)
+    response = jsonify({"ok": True})
+    response.set_etag(history.etag(version))
+    return response, 200
@@ -2,9 +2,11 @@
 Spotify API routes: search suggestions (app token) and recommendations (user token).
 """
 import threading
+from contextvars import copy_context
 from flask import Blueprint, request, jsonify
-from flask_login import login_required, current_user
+from flask_login import login_required
 from app import db
+from app.identity import load_current_user
 from app.spotify_client import (
     get_app_spotify,
     get_spotify_for_user,
@@ -17,8 +19,8 @@ bp = Blueprint("spotify_api", __name__)
 @bp.route("/status")
 @login_required
 def status():
-    """Return whether the current user has connected Spotify."""
-    return jsonify({"connected": bool(current_user.spotify_refresh_token)})
+    """Return whether the current user has connected Spotify (read fresh, not from the identity cache)."""
+    return jsonify({"connected": load_current_user().spotify_connected})
 
 
 @bp.route("/suggest")
@@ -68,7 +70,7 @@ def recommendations():
     """
     if not spotify_configured():
         return jsonify({"error": "Spotify not configured"}), 503
-    sp = get_spotify_for_user(current_user)
+    sp = get_spotify_for_user(load_current_user())
     if not sp:
         return jsonify({"error": "Connect Spotify to get recommendations", "tracks": []}), 200
     out = [None]
@@ -98,7 +100,7 @@ def recommendations():
         except Exception as e:
             err[0] = e
 
-    th = threading.Thread(target=_fetch)
+    th = threading.Thread(target=copy_context().run, args=(_fetch,))
     th.start()
     th.join(timeout=25)
     if th.is_alive():
@@ -122,7 +124,7 @@ def recommendations_artists():
     """
     if not spotify_configured():
         return jsonify({"error": "Spotify not configured", "artists": []}), 503
-    sp = get_spotify_for_user(current_user)
+    sp = get_spotify_for_user(load_current_user())
     if not sp:
         return jsonify({"error": "Connect Spotify", "artists": []}), 200
     result, err = [None], [None]
@@ -134,7 +136,7 @@ def recommendations_artists():
         except Exception as e:
             err[0] = e
 
-    th = threading.Thread(target=_fetch)
+    th = threading.Thread(target=copy_context().run, args=(_fetch,))
     th.start()
     th.join(timeout=25)
     if th.is_alive():
@@ -161,7 +163,7 @@ def recommendations_albums():
     """
     if not spotify_configured():
         return jsonify({"error": "Spotify not configured", "albums": []}), 503
-    sp = get_spotify_for_user(current_user)
+    sp = get_spotify_for_user(load_current_user())
     if not sp:
         return jsonify({"error": "Connect Spotify", "albums": []}), 200
     result, err = [None], [None]
@@ -185,7 +187,7 @@ def recommendations_albums():
         except Exception as e:
             err[0] = e
 
-    th = threading.Thread(target=_fetch)
+    th = threading.Thread(target=copy_context().run, args=(_fetch,))
     th.start()
     th.join(timeout=25)
     if th.is_alive():
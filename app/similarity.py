@@ -0,0 +1,250 @@
+"""
+"Users with similar taste": weighted-overlap (cosine) similarity over ranking lists.
+
+Every ranked item (per kind, case-folded name) gets a column in a shared item index. Each
+user is a sparse vector with weight 1 / log2(position + 1) per item, so agreeing on #1
+counts more than agreeing on #40. The index stores all entries sorted by item column;
+scoring a user gathers the postings for their items and sums per-user dot products with
+np.bincount, so one query touches only the entries that share an item with the user.
+For the best matches a Spearman correlation over the shared items is also reported.
+
+The index is rebuilt at most every SIMILARITY_INDEX_TTL seconds, and only once a ranking
+write has made it stale. The querying user's own vector is always read fresh, and their
+cached results are dropped as soon as they change a list (invalidate_user).
+"""
+import threading
+import time
+
+import numpy as np
+
+from app import db
+from app.leaderboards import RANKING_MODELS, item_key
+from app.models import User
+
+KINDS = tuple(RANKING_MODELS)  # "artists", "albums", "songs"
+ALL = "all"
+DEFAULT_INDEX_TTL_SEC = 60
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+SHARED_PREVIEW = 5
+# With two items Spearman can only be +1 or -1, so that is noise rather than agreement.
+MIN_CORRELATION_ITEMS = 3
+MAX_CACHED_RESULTS = 10000
+
+
+def rank_weight(positions):
+    return 1.0 / np.log2(np.asarray(positions, dtype=np.float64) + 1.0)
+
+
+def _load_entries(user_id=None):
+    """Yield (user_id, kind, name, rank_position) from all ranking tables."""
+    for kind, (model, column) in RANKING_MODELS.items():
+        query = db.session.query(model.user_id, getattr(model, column), model.rank_position)
+        if user_id is not None:
+            query = query.filter(model.user_id == user_id)
+        for uid, name, position in query:
+            yield uid, kind, name, position
+
+
+class SimilarityIndex:
+    """Immutable snapshot of every user's ranking vector."""
+
+    def __init__(self, entries):
+        self.columns = {}  # (kind, item_key) -> column
+        self.column_names = []
+        self.user_rows = {}  # user_id -> row
+        self.user_ids = []
+        users, cols, positions, kinds = [], [], [], []
+        for uid, kind, name, position in entries:
+            key = (kind, item_key(name))
+            col = self.columns.get(key)
+            if col is None:
+                col = self.columns[key] = len(self.column_names)
+                self.column_names.append(name)
+            row = self.user_rows.get(uid)
+            if row is None:
+                row = self.user_rows[uid] = len(self.user_ids)
+                self.user_ids.append(uid)
+            users.append(row)
+            cols.append(col)
+            positions.append(position)
+            kinds.append(KINDS.index(kind))
+        order = np.argsort(np.asarray(cols, dtype=np.int64), kind="stable")
+        self.item = np.asarray(cols, dtype=np.int64)[order]
+        self.user = np.asarray(users, dtype=np.int64)[order]
+        self.position = np.asarray(positions, dtype=np.int64)[order]
+        self.weight = rank_weight(self.position)
+        self.kind = kind_codes = np.asarray(kinds, dtype=np.int64)[order]
+        # Squared norms per user, one column per kind plus the total in the last column.
+        n_users = len(self.user_ids)
+        sq = np.zeros((n_users, len(KINDS) + 1))
+        for k in range(len(KINDS)):
+            mask = kind_codes == k
+            sq[:, k] = np.bincount(self.user[mask], weights=self.weight[mask] ** 2, minlength=n_users)
+        sq[:, -1] = sq[:, :-1].sum(axis=1)
+        self.norms = np.sqrt(sq)
+        self.built_at = time.monotonic()
+
+    def query_vector(self, entries):
+        """Map a user's (kind, name, position) entries onto index columns."""
+        cols, positions, sq_norm = [], [], 0.0
+        for kind, name, position in entries:
+            weight = 1.0 / np.log2(position + 1.0)
+            sq_norm += weight * weight
+            col = self.columns.get((kind, item_key(name)))
+            if col is not None:
+                cols.append(col)
+                positions.append(position)
+        return np.asarray(cols, dtype=np.int64), np.asarray(positions, dtype=np.int64), np.sqrt(sq_norm)
+
+    def _postings(self, cols):
+        """Indices into the sorted entry arrays for every entry in any of cols, plus group sizes."""
+        starts = np.searchsorted(self.item, cols, side="left")
+        ends = np.searchsorted(self.item, cols, side="right")
+        lengths = ends - starts
+        total = int(lengths.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64), lengths
+        offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(lengths)[:-1])), lengths)
+        return offsets + np.arange(total), lengths
+
+    def score(self, cols, positions, query_norm, kind_column, exclude_row=None):
+        """Cosine scores and shared-item counts of the query against every indexed user."""
+        n_users = len(self.user_ids)
+        scores = np.zeros(n_users)
+        shared = np.zeros(n_users, dtype=np.int64)
+        if n_users == 0 or cols.size == 0 or query_norm == 0:
+            return scores, shared
+        idx, lengths = self._postings(cols)
+        if idx.size == 0:
+            return scores, shared
+        query_weight = np.repeat(rank_weight(positions), lengths)
+        rows = self.user[idx]
+        dots = np.bincount(rows, weights=query_weight * self.weight[idx], minlength=n_users)
+        shared = np.bincount(rows, minlength=n_users)
+        norms = self.norms[:, kind_column]
+        np.divide(dots, norms * query_norm, out=scores, where=norms > 0)
+        if exclude_row is not None:
+            scores[exclude_row] = 0.0
+            shared[exclude_row] = 0
+        return scores, shared
+
+    def shared_items(self, cols, positions, row):
+        """Shared (name, kind code, query position, other position) for one other user, best first."""
+        idx, lengths = self._postings(cols)
+        if idx.size == 0:
+            return []
+        query_pos = np.repeat(positions, lengths)
+        mask = self.user[idx] == row
+        items = self.item[idx][mask]
+        kinds = self.kind[idx][mask]
+        mine = query_pos[mask]
+        theirs = self.position[idx][mask]
+        order = np.argsort(mine + theirs, kind="stable")
+        return [(self.column_names[items[i]], int(kinds[i]), int(mine[i]), int(theirs[i])) for i in order]
+
+
+def spearman(xs, ys):
+    """Spearman rank correlation of two position lists from the same pair of rankings."""
+    if len(xs) < MIN_CORRELATION_ITEMS:
+        return None
+    rx = np.argsort(np.argsort(xs)).astype(np.float64)
+    ry = np.argsort(np.argsort(ys)).astype(np.float64)
+    n = len(xs)
+    return float(1 - 6 * np.sum((rx - ry) ** 2) / (n * (n * n - 1)))
+
+
+def rank_correlation(items):
+    """
+    Spearman over shared items, computed per kind and averaged weighted by item count. Kinds with
+    fewer than MIN_CORRELATION_ITEMS shared items are skipped; None if no kind has enough.
+    """
+    total, weight = 0.0, 0
+    for k in range(len(KINDS)):
+        pairs = [(mine, theirs) for _, kind, mine, theirs in items if kind == k]
+        rho = spearman([p[0] for p in pairs], [p[1] for p in pairs])
+        if rho is not None:
+            total += rho * len(pairs)
+            weight += len(pairs)
+    return round(total / weight, 4) if weight else None
+
+
+class SimilarityEngine:
+    """Holds the current index and a per-user results cache."""
+
+    def __init__(self, index_ttl=DEFAULT_INDEX_TTL_SEC):
+        self.index_ttl = index_ttl
+        self._index = None
+        self._stale = True
+        self._results = {}  # (user_id, kind, limit) -> results
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+
+    def invalidate_user(self, user_id):
+        """Call after a user's rankings change."""
+        with self._lock:
+            self._stale = True
+            for key in [k for k in self._results if k[0] == user_id]:
+                del self._results[key]
+
+    def _current_index(self):
+        index = self._index
+        if index is not None and not (self._stale and time.monotonic() - index.built_at >= self.index_ttl):
+            return index
+        with self._build_lock:
+            index = self._index
+            if index is not None and not (self._stale and time.monotonic() - index.built_at >= self.index_ttl):
+                return index
+            with self._lock:
+                self._stale = False
+            index = SimilarityIndex(_load_entries())
+            with self._lock:
+                self._index = index
+                self._results.clear()
+            return index
+
+    def similar_users(self, user_id, kind=ALL, limit=DEFAULT_LIMIT):
+        cache_key = (user_id, kind, limit)
+        index = self._current_index()
+        with self._lock:
+            cached = self._results.get(cache_key)
+        if cached is not None:
+            return cached
+        own = [(k, name, pos) for _, k, name, pos in _load_entries(user_id) if kind == ALL or k == kind]
+        cols, positions, query_norm = index.query_vector(own)
+        kind_column = len(KINDS) if kind == ALL else KINDS.index(kind)
+        scores, shared = index.score(cols, positions, query_norm, kind_column, index.user_rows.get(user_id))
+        candidates = np.flatnonzero(scores > 0)
+        if candidates.size > limit:
+            candidates = candidates[np.argpartition(-scores[candidates], limit - 1)[:limit]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        usernames = dict(
+            db.session.query(User.id, User.username).filter(User.id.in_([index.user_ids[r] for r in candidates]))
+        ) if candidates.size else {}
+        results = []
+        for row in candidates:
+            other_id = index.user_ids[row]
+            if other_id not in usernames:
+                continue
+            items = index.shared_items(cols, positions, row)
+            results.append({
+                "user_id": other_id,
+                "username": usernames[other_id],
+                "score": round(float(scores[row]), 4),
+                "shared_count": int(shared[row]),
+                "rank_correlation": rank_correlation(items),
+                "shared": [item[0] for item in items[:SHARED_PREVIEW]],
+            })
+        with self._lock:
+            if self._index is index:
+                if len(self._results) >= MAX_CACHED_RESULTS:
+                    self._results.clear()
+                self._results[cache_key] = results
+        return results
+
+
+similarity_engine = SimilarityEngine()
+
+
+def init_similarity(app):
+    similarity_engine.index_ttl = app.config.get("SIMILARITY_INDEX_TTL", DEFAULT_INDEX_TTL_SEC)
@@ -2,20 +2,76 @@
 Spotify API helpers: app-level token for search, user-level OAuth for recommendations.
 """
 import os
+import re
 import threading
 import time
-from spotipy import Spotify
+from contextvars import copy_context
+from urllib.parse import urlsplit
+import requests
+from spotipy import Spotify, SpotifyException
 from spotipy.oauth2 import SpotifyOAuth, SpotifyClientCredentials
 from spotipy.cache_handler import CacheHandler
+from app.metrics import record_spotify_call
 
 REFRESH_TIMEOUT_SEC = 10
 
+# Spotify IDs are 22-char base62; replace them so metric labels stay low-cardinality.
+_SPOTIFY_ID_RE = re.compile(r"^[0-9A-Za-z]{22}$")
+
+
+def _endpoint_label(url):
+    path = urlsplit(url).path
+    if path.startswith("/v1/"):
+        path = path[len("/v1/"):]
+    return "/".join(":id" if _SPOTIFY_ID_RE.match(part) else part for part in path.strip("/").split("/"))
+
+
+class TimedSpotify(Spotify):
+    """Spotify client that reports each Web API call's latency to app.metrics."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prefix = get_spotify_config()["api_url"]
+
+    def _internal_call(self, method, url, payload, params):
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            return super()._internal_call(method, url, payload, params)
+        except SpotifyException as e:
+            status = str(e.http_status)
+            raise
+        except Exception:
+            status = "error"
+            raise
+        finally:
+            if not url.startswith("http"):
+                url = self.prefix + url
+            record_spotify_call(_endpoint_label(url), status, time.perf_counter() - start)
+
+
+class TimedTokenSession(requests.Session):
+    """requests session for spotipy auth managers; reports token endpoint calls as "token"."""
+
+    def request(self, method, url, *args, **kwargs):
+        start = time.perf_counter()
+        status = "error"
+        try:
+            response = super().request(method, url, *args, **kwargs)
+            status = "ok" if response.status_code < 400 else str(response.status_code)
+            return response
+        finally:
+            record_spotify_call("token", status, time.perf_counter() - start)
+
 
 def get_spotify_config():
     return {
         "client_id": os.environ.get("SPOTIFY_CLIENT_ID", ""),
         "client_secret": os.environ.get("SPOTIFY_CLIENT_SECRET", ""),
         "redirect_uri": os.environ.get("SPOTIFY_REDIRECT_URI", "http://127.0.0.1:5001/auth/spotify/callback"),
+        # Overridable so benchmarks can point at a local stand-in (see bench/fake_spotify.py).
+        "api_url": os.environ.get("SPOTIFY_API_URL", "https://api.spotify.com/v1/"),
+        "token_url": os.environ.get("SPOTIFY_TOKEN_URL", SpotifyOAuth.OAUTH_TOKEN_URL),
     }
 
 
@@ -62,14 +118,17 @@ def get_spotify_oauth(redirect_uri=None):
     cfg = get_spotify_config()
     if not cfg["client_id"] or not cfg["client_secret"]:
         return None
-    return SpotifyOAuth(
+    auth = SpotifyOAuth(
         client_id=cfg["client_id"],
         client_secret=cfg["client_secret"],
         redirect_uri=redirect_uri or cfg["redirect_uri"],
         scope="user-top-read",
         open_browser=False,
         requests_timeout=12,
+        requests_session=TimedTokenSession(),
     )
+    auth.OAUTH_TOKEN_URL = cfg["token_url"]
+    return auth
 
 
 def _user_has_valid_token(user):
@@ -104,7 +163,7 @@ def get_spotify_for_user(user):
         return None
     # If we already have a valid token, use it directly.
     if _user_has_valid_token(user):
-        return Spotify(auth=user.spotify_access_token, requests_timeout=15)
+        return TimedSpotify(auth=user.spotify_access_token, requests_timeout=15)
     # Otherwise explicitly refresh the token.
     result = [None]
     err = [None]
@@ -118,7 +177,9 @@ def get_spotify_for_user(user):
                 scope="user-top-read",
                 open_browser=False,
                 requests_timeout=12,
+                requests_session=TimedTokenSession(),
             )
+            auth.OAUTH_TOKEN_URL = cfg["token_url"]
             token_info = auth.refresh_access_token(user.spotify_refresh_token)
             if token_info and token_info.get("access_token"):
                 user.spotify_access_token = token_info["access_token"]
@@ -129,7 +190,7 @@ def get_spotify_for_user(user):
         except Exception as e:
             err[0] = e
 
-    th = threading.Thread(target=_do_refresh)
+    th = threading.Thread(target=copy_context().run, args=(_do_refresh,))
     th.start()
     th.join(timeout=REFRESH_TIMEOUT_SEC)
     if th.is_alive():
@@ -137,7 +198,7 @@ def get_spotify_for_user(user):
     if err[0] or not result[0]:
         _clear_user_spotify_tokens(user)
         return None
-    return Spotify(auth=result[0], requests_timeout=15)
+    return TimedSpotify(auth=result[0], requests_timeout=15)
 
 
 _app_client = None
@@ -156,8 +217,10 @@ def get_app_spotify():
         auth = SpotifyClientCredentials(
             client_id=cfg["client_id"],
             client_secret=cfg["client_secret"],
+            requests_session=TimedTokenSession(),
         )
-        _app_client = Spotify(auth_manager=auth, requests_timeout=15)
+        auth.OAUTH_TOKEN_URL = cfg["token_url"]
+        _app_client = TimedSpotify(auth_manager=auth, requests_timeout=15)
         _app_token_expires = time.time() + 3600
         return _app_client
     except Exception:
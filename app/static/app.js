@@ -2,22 +2,30 @@
   const apis = window.TUNEDUP?.apis || { artists: "/api/artists", albums: "/api/albums", songs: "/api/songs" };
   const types = ["artists", "albums", "songs"];
   const nameKeys = { artists: "artist_name", albums: "album_name", songs: "song_name" };
+  // Last list version seen per type (from ETag "vN"); null until the list is loaded.
+  const versions = { artists: null, albums: null, songs: null };
 
   function getCsrfToken() {
     const meta = document.querySelector('meta[name="csrf-token"]');
     return meta ? meta.getAttribute("content") : null;
   }
 
-  async function api(type, method, path, body) {
+  function parseVersion(etag) {
+    const m = etag && etag.match(/"v(\d+)"/);
+    return m ? parseInt(m[1], 10) : null;
+  }
+
+  async function api(type, method, path, body, headers) {
     const base = apis[type] || "/api/artists";
     const opts = { method, headers: { "Content-Type": "application/json" } };
     if (body) opts.body = JSON.stringify(body);
+    if (headers) Object.assign(opts.headers, headers);
     const token = getCsrfToken();
     if (token) opts.headers["X-CSRFToken"] = token;
     const res = await fetch(base + path, opts);
     const data = await res.json().catch(() => ({}));
     if (!res.ok) throw new Error(data.error || res.statusText);
-    return data;
+    return { data, version: parseVersion(res.headers.get("ETag")) };
   }
 
   function escapeHtml(s) {
@@ -88,8 +96,12 @@
   async function loadRankings(type) {
     const p = panels.find((x) => x.type === type);
     if (!p || !p.listEl) return;
+    // Counts as a write in flight so live events queue until the fresh list is in place.
+    pending[type]++;
     try {
-      const data = await api(type, "GET", "/");
+      const { data, version } = await api(type, "GET", "/");
+      versions[type] = version;
+      queued[type] = queued[type].filter((ev) => version === null || ev.version > version);
       p.listEl.innerHTML = "";
       data.forEach((item) => p.listEl.appendChild(renderItem(type, item)));
       setEmpty(type, data.length === 0);
@@ -97,6 +109,100 @@
       if (e.message === "Unauthorized" || String(e.message).includes("401")) {
         window.location.href = "/auth/login?next=" + encodeURIComponent(window.location.pathname);
       }
+      queued[type] = [];
+    } finally {
+      pending[type]--;
+      flushQueued(type);
+    }
+  }
+
+  // ——— Live sync: change events from other tabs/devices (Server-Sent Events) ———
+  // While this tab has a write in flight (or a drag in progress) for a list, events for it are
+  // queued and applied afterwards, skipping any the write's response already covers.
+  const pending = { artists: 0, albums: 0, songs: 0 };
+  const queued = { artists: [], albums: [], songs: [] };
+
+  function applyMoves(listEl, ops) {
+    ops.forEach((op) => {
+      if (op[0] !== "m") return;
+      const el = listEl.querySelectorAll(".ranking-item")[op[1]];
+      if (!el) return;
+      el.remove();
+      listEl.insertBefore(el, listEl.querySelectorAll(".ranking-item")[op[2]] || null);
+    });
+  }
+
+  // Returns false if the event showed a gap in what this tab has seen (the list is reloaded).
+  function applyEvent(ev) {
+    const known = versions[ev.kind];
+    const listEl = getListEl(ev.kind);
+    if (known === null || known === undefined || !listEl) return true;
+    if (ev.version <= known) return true;
+    if (ev.version !== known + 1) {
+      loadRankings(ev.kind);
+      return false;
+    }
+    if (ev.type === "add") {
+      if (!listEl.querySelector('[data-id="' + ev.item.id + '"]')) listEl.appendChild(renderItem(ev.kind, ev.item));
+    } else if (ev.type === "remove") {
+      const el = listEl.querySelector('[data-id="' + ev.id + '"]');
+      if (el) el.remove();
+      applyMoves(listEl, ev.ops || []);
+    } else if (ev.type === "reorder") {
+      applyMoves(listEl, ev.ops || []);
+    }
+    syncRanks(ev.kind);
+    setEmpty(ev.kind, listEl.children.length === 0);
+    versions[ev.kind] = ev.version;
+    return true;
+  }
+
+  // Apply this tab's own write, which the server stored as version, in order with changes from
+  // elsewhere: queued events before it go first, and if any are still missing the list is reloaded
+  // (the reload includes this write, so applyLocal is skipped). A version this tab already has
+  // (a no-op reorder, or a write whose event was applied first) needs nothing more.
+  function applyOwnWrite(type, version, applyLocal) {
+    if (version === null || versions[type] === null) {
+      applyLocal();
+      return;
+    }
+    if (version <= versions[type]) return;
+    const earlier = queued[type].filter((ev) => ev.version < version).sort((a, b) => a.version - b.version);
+    queued[type] = queued[type].filter((ev) => ev.version > version);
+    for (const ev of earlier) {
+      if (!applyEvent(ev)) return;
+    }
+    if (version > versions[type] + 1) {
+      loadRankings(type);
+      return;
+    }
+    applyLocal();
+    versions[type] = version;
+  }
+
+  function isBusy(type) {
+    return pending[type] > 0 || (draggedEl && draggedEl.dataset.type === type);
+  }
+
+  function flushQueued(type) {
+    while (!isBusy(type) && queued[type].length) {
+      if (!applyEvent(queued[type].shift())) return;
+    }
+  }
+
+  function handleEvent(ev) {
+    if (!ev || !types.includes(ev.kind)) return;
+    if (isBusy(ev.kind)) queued[ev.kind].push(ev);
+    else applyEvent(ev);
+  }
+
+  async function withPending(type, fn) {
+    pending[type]++;
+    try {
+      return await fn();
+    } finally {
+      pending[type]--;
+      flushQueued(type);
     }
   }
 
@@ -107,34 +213,45 @@
     const name = (p.inputEl.value || "").trim();
     if (!name) return false;
     p.addBtn.disabled = true;
+    pending[type]++;
     try {
       const payload = {};
       payload[nameKey] = name;
-      const item = await api(type, "POST", "/", payload);
-      p.listEl.appendChild(renderItem(type, item, imageUrl));
-      setEmpty(type, false);
-      syncRanks(type);
+      const { data: item, version } = await api(type, "POST", "/", payload);
       p.inputEl.value = "";
+      applyOwnWrite(type, version, () => {
+        p.listEl.appendChild(renderItem(type, item, imageUrl));
+        setEmpty(type, false);
+        syncRanks(type);
+      });
       return true;
     } catch (e) {
       alert(e.message || "Could not add");
       return false;
     } finally {
       p.addBtn.disabled = false;
+      pending[type]--;
+      flushQueued(type);
     }
   }
 
   async function removeItem(type, id) {
     const p = panels.find((x) => x.type === type);
     if (!p) return;
+    pending[type]++;
     try {
-      await api(type, "DELETE", "/" + id);
-      const el = p.listEl.querySelector('[data-id="' + id + '"]');
-      if (el) el.remove();
-      syncRanks(type);
-      setEmpty(type, p.listEl.children.length === 0);
+      const { version } = await api(type, "DELETE", "/" + id);
+      applyOwnWrite(type, version, () => {
+        const el = p.listEl.querySelector('[data-id="' + id + '"]');
+        if (el) el.remove();
+        syncRanks(type);
+        setEmpty(type, p.listEl.children.length === 0);
+      });
     } catch (e) {
       alert(e.message || "Could not remove");
+    } finally {
+      pending[type]--;
+      flushQueued(type);
     }
   }
 
@@ -148,6 +265,7 @@
   function onDragEnd(e) {
     e.currentTarget.classList.remove("dragging");
     draggedEl = null;
+    flushQueued(e.currentTarget.dataset.type);
   }
 
   function onDragOver(e) {
@@ -173,7 +291,12 @@
     const listEl = getListEl(type);
     if (!listEl) return;
     const order = Array.from(listEl.querySelectorAll(".ranking-item")).map((el) => parseInt(el.dataset.id, 10));
-    api(type, "PUT", "/reorder", { order }).then(() => syncRanks(type)).catch(() => loadRankings(type));
+    // If-Match makes the server reject (412) a reorder based on a list that changed elsewhere.
+    const headers = versions[type] !== null ? { "If-Match": '"v' + versions[type] + '"' } : null;
+    withPending(type, async () => {
+      const { version } = await api(type, "PUT", "/reorder", { order }, headers);
+      applyOwnWrite(type, version, () => syncRanks(type));
+    }).catch(() => loadRankings(type));
   }
 
   function switchPanel(type) {
@@ -208,6 +331,46 @@
 
   switchPanel("artists");
 
+  const eventsUrl = window.TUNEDUP?.events;
+  let lastEventId = null;
+  let evictions = 0;
+
+  function connectEvents() {
+    const url = lastEventId ? eventsUrl + "?last_event_id=" + encodeURIComponent(lastEventId) : eventsUrl;
+    const source = new EventSource(url);
+    source.onmessage = (e) => {
+      evictions = 0;
+      if (e.lastEventId) lastEventId = e.lastEventId;
+      try {
+        handleEvent(JSON.parse(e.data));
+      } catch (err) {
+        /* ignore malformed events */
+      }
+    };
+    // Too many open streams for this account and this was the oldest. Don't let EventSource
+    // reconnect straight away (that would push out the next one); come back after the server's
+    // delay, doubling it while evictions repeat, and resume from the last event seen.
+    source.addEventListener("evicted", (e) => {
+      source.close();
+      let delay = 60000;
+      try {
+        delay = JSON.parse(e.data).retry_ms || delay;
+      } catch (err) {
+        /* keep the default */
+      }
+      delay *= Math.pow(2, Math.min(evictions, 4));
+      evictions++;
+      setTimeout(connectEvents, delay * (1 + Math.random() * 0.2));
+    });
+    source.addEventListener("resync", () => {
+      types.forEach((t) => {
+        if (versions[t] !== null) loadRankings(t);
+      });
+    });
+  }
+
+  if (eventsUrl && window.EventSource) connectEvents();
+
   // ——— Spotify (deferred so page paints first; short timeout so status never blocks) ———
   const spotifyBase = window.TUNEDUP?.spotify;
   if (spotifyBase) {
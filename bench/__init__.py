@@ -0,0 +1 @@
+"""Load and latency benchmarks for Tuned Up. See README "Benchmarks"."""
@@ -0,0 +1,232 @@
+"""
+Local stand-in for the Spotify accounts and Web API endpoints the app uses.
+
+Serves /api/token, /v1/search, /v1/me/top/tracks and /v1/me/top/artists with deterministic
+fake data, plus configurable latency, 429 rate limiting and 5xx errors. Point the app at it
+with SPOTIFY_API_URL=<url>/v1/ and SPOTIFY_TOKEN_URL=<url>/api/token.
+
+Run standalone: python -m bench.fake_spotify --port 8900 --latency-ms 80 --rate-429 0.02
+"""
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+_BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz"
+
+
+def fake_id(kind, n):
+    """Deterministic 22-char base62 ID, shaped like a real Spotify ID."""
+    value = int.from_bytes(hashlib.sha1(f"{kind}:{n}".encode()).digest(), "big")
+    chars = []
+    for _ in range(22):
+        value, rem = divmod(value, 62)
+        chars.append(_BASE62[rem])
+    return "".join(chars)
+
+
+def _image(kind, n):
+    return [{"url": f"https://i.example.invalid/{kind}/{n}.jpg", "width": 64, "height": 64}]
+
+
+def _artist(n):
+    return {"id": fake_id("artist", n), "name": f"Artist {n}", "images": _image("artist", n)}
+
+
+def _album(n):
+    return {
+        "id": fake_id("album", n),
+        "name": f"Album {n}",
+        "artists": [_artist(n % 500)],
+        "images": _image("album", n),
+    }
+
+
+def _track(n):
+    return {
+        "id": fake_id("track", n),
+        "name": f"Track {n}",
+        "artists": [_artist(n % 500), _artist((n * 7) % 500)],
+        "album": _album(n % 2000),
+    }
+
+
+class FakeSpotifyConfig:
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, rate_429=0.0, retry_after=1, error_rate=0.0, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {}
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+    def roll(self):
+        """Return (delay_sec, status_override or None) for one request."""
+        with self.lock:
+            delay = max(0.0, self.latency_ms + self.random.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            r = self.random.random()
+        if r < self.rate_429:
+            return delay, 429
+        if r < self.rate_429 + self.error_rate:
+            return delay, 500
+        return delay, None
+
+
+class FakeSpotifyHandler(BaseHTTPRequestHandler):
+    server_version = "FakeSpotify/1.0"
+    protocol_version = "HTTP/1.1"
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _misbehave(self, endpoint):
+        """Apply latency and maybe answer 429/500. Returns True if a response was sent."""
+        delay, status = self.config.roll()
+        if delay:
+            time.sleep(delay)
+        if status == 429:
+            self.config.count(f"{endpoint} 429")
+            self._send_json(429, {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                            {"Retry-After": str(self.config.retry_after)})
+            return True
+        if status == 500:
+            self.config.count(f"{endpoint} 500")
+            self._send_json(500, {"error": {"status": 500, "message": "Server error"}})
+            return True
+        self.config.count(endpoint)
+        return False
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        self.rfile.read(length)
+        path = urlsplit(self.path).path
+        if path != "/api/token":
+            return self._send_json(404, {"error": "not found"})
+        if self._misbehave("token"):
+            return
+        self._send_json(200, {
+            "access_token": "fake-access-token",
+            "token_type": "Bearer",
+            "expires_in": 3600,
+            "scope": "user-top-read",
+        })
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+        limit = min(50, int(query.get("limit", ["20"])[0]))
+        path = parts.path.rstrip("/")
+        if path == "/v1/search":
+            if self._misbehave("search"):
+                return
+            q = query.get("q", [""])[0]
+            seed = int(hashlib.sha1(q.encode()).hexdigest()[:6], 16)
+            body = {}
+            for kind in query.get("type", ["artist"])[0].split(","):
+                make = {"artist": _artist, "track": _track, "album": _album}.get(kind)
+                if make:
+                    body[kind + "s"] = {"items": [make(seed + i) for i in range(limit)]}
+            return self._send_json(200, body)
+        if path in ("/v1/me/top/tracks", "/v1/me/top/artists"):
+            kind = path.rsplit("/", 1)[1]
+            if self._misbehave("me/top/" + kind):
+                return
+            offset = {"short_term": 0, "medium_term": 10, "long_term": 25}.get(query.get("time_range", [""])[0], 0)
+            make = _track if kind == "tracks" else _artist
+            return self._send_json(200, {"items": [make(offset + i) for i in range(limit)]})
+        self._send_json(404, {"error": {"status": 404, "message": "Service not found"}})
+
+
+class FakeSpotifyServer:
+    """Threaded fake Spotify server; use as a context manager or call start()/stop()."""
+
+    def __init__(self, config=None, host="127.0.0.1", port=0):
+        self.config = config or FakeSpotifyConfig()
+        self.httpd = ThreadingHTTPServer((host, port), FakeSpotifyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.config = self.config
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="fake-spotify", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def add_arguments(parser):
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mean added latency per Spotify call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="uniform +/- jitter on latency")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="fraction of calls answered 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of calls answered 500")
+
+
+def config_from_args(args, seed=None):
+    return FakeSpotifyConfig(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        rate_429=args.rate_429,
+        retry_after=args.retry_after,
+        error_rate=args.error_rate,
+        seed=seed,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local fake Spotify API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    add_arguments(parser)
+    args = parser.parse_args()
+    server = FakeSpotifyServer(config_from_args(args), args.host, args.port)
+    print(f"Fake Spotify on {server.url}")
+    print(f"  SPOTIFY_API_URL={server.url}/v1/  SPOTIFY_TOKEN_URL={server.url}/api/token")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
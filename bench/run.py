@@ -0,0 +1,351 @@
+"""
+Reproducible load benchmark: seeds a throwaway SQLite DB, starts the app and a fake Spotify
+server in-process, drives the ranking and /api/spotify routes concurrently, and reports
+throughput and latency percentiles per scenario.
+
+Run from the project root:
+    python -m bench.run --users 50 --list-size 200 --concurrency 8 --duration 15 --json bench.json
+    python -m bench.run ... --compare bench.json     # exits 1 on regression beyond --threshold
+"""
+import argparse
+import heapq
+import json
+import logging
+import math
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from bench.fake_spotify import FakeSpotifyServer, add_arguments, config_from_args
+
+RANKING_TYPES = {"artists": "artist_name", "albums": "album_name", "songs": "song_name"}
+DEFAULT_MIX = "list=4,reorder=2,add_remove=2,leaderboard=1,similar=1,suggest=2,status=1,recommendations=1"
+BENCH_PASSWORD = "bench-password"
+DEFAULT_CATALOG_SIZE = 2000
+DEFAULT_ZIPF = 1.0
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def configure_env(args, workdir, spotify_url):
+    """Point the app at the throwaway DB and the fake Spotify before it is imported."""
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(workdir, "bench.db")
+    os.environ["SPOTIFY_CLIENT_ID"] = "bench-client"
+    os.environ["SPOTIFY_CLIENT_SECRET"] = "bench-secret"
+    os.environ["SPOTIFY_API_URL"] = spotify_url + "/v1/"
+    os.environ["SPOTIFY_TOKEN_URL"] = spotify_url + "/api/token"
+    os.environ["PASSWORD_HASH_METHOD"] = args.hash_method
+    os.environ.setdefault("SECRET_KEY", "bench-secret-key")
+
+
+def sample_list(rng, weights, size):
+    """Draw size distinct catalogue indices, weighted, in ranked order (weighted sampling without
+    replacement via keys u ** (1 / w); popular items tend to land both on more lists and nearer the top)."""
+    return [i for _, i in heapq.nlargest(size, ((rng.random() ** (1.0 / w), i) for i, w in enumerate(weights)))]
+
+
+def seed(app, users, list_size, catalog_size=DEFAULT_CATALOG_SIZE, zipf=DEFAULT_ZIPF, seed_value=1):
+    """
+    Insert users with full ranking lists and a connected (fake) Spotify account. Lists are drawn
+    from a shared Zipf-weighted catalogue per kind so users overlap the way real tastes do, which
+    is what gives the leaderboard and similar-taste routes real work to do.
+    """
+    from werkzeug.security import generate_password_hash
+    from app import db
+    from app.leaderboards import recompute
+    from app.models import User, ArtistRanking, AlbumRanking, SongRanking
+
+    pwhash = generate_password_hash(BENCH_PASSWORD, method=app.config["PASSWORD_HASH_METHOD"])
+    expires = int(time.time()) + 24 * 3600
+    with app.app_context():
+        db.session.execute(
+            User.__table__.insert(),
+            [
+                {
+                    "username": f"bench{u}",
+                    "email": f"bench{u}@example.invalid",
+                    "password_hash": pwhash,
+                    "spotify_id": f"bench{u}",
+                    "spotify_refresh_token": "fake-refresh-token",
+                    "spotify_access_token": "fake-access-token",
+                    "spotify_token_expires_at": expires,
+                }
+                for u in range(users)
+            ],
+        )
+        ids = [row[0] for row in db.session.query(User.id).order_by(User.id)]
+        rng = random.Random(seed_value)
+        catalog_size = max(catalog_size, list_size)
+        weights = [1.0 / (k + 1) ** zipf for k in range(catalog_size)]
+        for model, column in ((ArtistRanking, "artist_name"), (AlbumRanking, "album_name"), (SongRanking, "song_name")):
+            rows = [
+                {"user_id": uid, column: f"{column} {item}", "rank_position": i + 1}
+                for uid in ids
+                for i, item in enumerate(sample_list(rng, weights, list_size))
+            ]
+            if rows:
+                db.session.execute(model.__table__.insert(), rows)
+        db.session.commit()
+        recompute()
+    return ids
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def record(self, name, elapsed, ok):
+        with self._lock:
+            self.samples.setdefault(name, []).append(elapsed)
+            if not ok:
+                self.errors[name] = self.errors.get(name, 0) + 1
+
+
+def _timed(recorder, name, fn):
+    start = time.perf_counter()
+    try:
+        resp = fn()
+        ok = resp.status_code < 400 and not _is_soft_error(resp)
+    except requests.RequestException:
+        resp, ok = None, False
+    recorder.record(name, time.perf_counter() - start, ok)
+    return resp if ok else None
+
+
+def _is_soft_error(resp):
+    """Spotify routes report upstream failures as 200 with an "error" key."""
+    if not resp.headers.get("Content-Type", "").startswith("application/json"):
+        return False
+    body = resp.json()
+    return isinstance(body, dict) and bool(body.get("error"))
+
+
+def scenario_list(client, recorder, rng, state):
+    kind = rng.choice(list(RANKING_TYPES))
+    _timed(recorder, f"list {kind}", lambda: client.get(f"{state['base']}/api/{kind}/"))
+
+
+def scenario_reorder(client, recorder, rng, state):
+    kind = rng.choice(list(RANKING_TYPES))
+    resp = client.get(f"{state['base']}/api/{kind}/")
+    if resp.status_code != 200:
+        return
+    order = [item["id"] for item in resp.json()]
+    if len(order) > 1:
+        i, j = rng.randrange(len(order)), rng.randrange(len(order))
+        order.insert(j, order.pop(i))
+    _timed(recorder, f"reorder {kind}", lambda: client.put(f"{state['base']}/api/{kind}/reorder", json={"order": order}))
+
+
+def scenario_add_remove(client, recorder, rng, state):
+    kind = rng.choice(list(RANKING_TYPES))
+    state["counter"] += 1
+    name = f"bench-w{state['worker']}-{state['counter']}"
+    resp = _timed(recorder, f"add {kind}",
+                  lambda: client.post(f"{state['base']}/api/{kind}/", json={RANKING_TYPES[kind]: name}))
+    if resp is not None:
+        item_id = resp.json()["id"]
+        _timed(recorder, f"remove {kind}", lambda: client.delete(f"{state['base']}/api/{kind}/{item_id}"))
+
+
+def scenario_leaderboard(client, recorder, rng, state):
+    kind = rng.choice(list(RANKING_TYPES))
+    by = rng.choice(("count", "avg"))
+    _timed(recorder, f"leaderboard {kind} {by}",
+           lambda: client.get(f"{state['base']}/api/leaderboards/{kind}", params={"by": by}))
+
+
+def scenario_similar(client, recorder, rng, state):
+    kind = rng.choice(("all",) + tuple(RANKING_TYPES))
+    _timed(recorder, f"similar {kind}", lambda: client.get(f"{state['base']}/api/similar/", params={"kind": kind}))
+
+
+def scenario_suggest(client, recorder, rng, state):
+    kind = rng.choice(("artist", "track", "album"))
+    q = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 6)))
+    _timed(recorder, f"spotify suggest {kind}",
+           lambda: client.get(f"{state['base']}/api/spotify/suggest", params={"q": q, "type": kind, "limit": 8}))
+
+
+def scenario_status(client, recorder, rng, state):
+    _timed(recorder, "spotify status", lambda: client.get(f"{state['base']}/api/spotify/status"))
+
+
+def scenario_recommendations(client, recorder, rng, state):
+    path = rng.choice(("recommendations", "recommendations/artists", "recommendations/albums"))
+    _timed(recorder, f"spotify {path}", lambda: client.get(f"{state['base']}/api/spotify/{path}"))
+
+
+SCENARIOS = {
+    "list": scenario_list,
+    "reorder": scenario_reorder,
+    "add_remove": scenario_add_remove,
+    "leaderboard": scenario_leaderboard,
+    "similar": scenario_similar,
+    "suggest": scenario_suggest,
+    "status": scenario_status,
+    "recommendations": scenario_recommendations,
+}
+
+
+def worker(worker_id, base, user_count, mix, deadline, recorder, seed_value):
+    rng = random.Random(seed_value + worker_id)
+    client = requests.Session()
+    username = f"bench{worker_id % user_count}"
+    resp = client.post(f"{base}/auth/login", data={"username": username, "password": BENCH_PASSWORD},
+                       allow_redirects=False)
+    if resp.status_code != 302:
+        raise RuntimeError(f"login failed for {username}: HTTP {resp.status_code}")
+    names, weights = list(mix), list(mix.values())
+    state = {"base": base, "worker": worker_id, "counter": 0}
+    while time.monotonic() < deadline:
+        SCENARIOS[rng.choices(names, weights)[0]](client, recorder, rng, state)
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    k = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+
+def summarize(recorder, duration):
+    results = {}
+    for name, samples in sorted(recorder.samples.items()):
+        values = sorted(samples)
+        results[name] = {
+            "count": len(values),
+            "errors": recorder.errors.get(name, 0),
+            "rps": round(len(values) / duration, 2),
+            "p50_ms": round(percentile(values, 50) * 1000, 2),
+            "p90_ms": round(percentile(values, 90) * 1000, 2),
+            "p99_ms": round(percentile(values, 99) * 1000, 2),
+            "max_ms": round(values[-1] * 1000, 2),
+        }
+    return results
+
+
+def print_table(results):
+    header = f"{'scenario':34} {'count':>7} {'err':>5} {'req/s':>8} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(f"{name:34} {r['count']:7} {r['errors']:5} {r['rps']:8.1f} {r['p50_ms']:8.1f} "
+              f"{r['p90_ms']:8.1f} {r['p99_ms']:8.1f} {r['max_ms']:8.1f}")
+
+
+def compare(results, baseline, threshold):
+    """Print deltas against a previous --json run; return True if anything regressed."""
+    regressed = False
+    print(f"\nCompared to baseline ({baseline['meta'].get('commit') or 'unknown commit'}):")
+    for name, r in results.items():
+        base = baseline["results"].get(name)
+        if not base:
+            continue
+        p99 = (r["p99_ms"] - base["p99_ms"]) / base["p99_ms"] if base["p99_ms"] else 0.0
+        rps = (r["rps"] - base["rps"]) / base["rps"] if base["rps"] else 0.0
+        flag = ""
+        if p99 > threshold or rps < -threshold:
+            flag = "  REGRESSION"
+            regressed = True
+        print(f"  {name:34} p99 {p99:+7.1%}   req/s {rps:+7.1%}{flag}")
+    return regressed
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Tuned Up's ranking and Spotify routes.")
+    parser.add_argument("--users", type=int, default=20, help="users to seed")
+    parser.add_argument("--list-size", type=int, default=100, help="items per ranking list per user")
+    parser.add_argument("--catalog-size", type=int, default=DEFAULT_CATALOG_SIZE,
+                        help="distinct items per kind that seeded lists are drawn from")
+    parser.add_argument("--zipf", type=float, default=DEFAULT_ZIPF,
+                        help="Zipf exponent for item popularity in seeded lists (0 = uniform)")
+    parser.add_argument("--concurrency", type=int, default=8, help="concurrent client workers")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to drive load")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help=f"scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1, help="random seed for scenario selection")
+    parser.add_argument("--hash-method", default="pbkdf2:sha256:1000",
+                        help="password hash method for seeded users (cheap by default; logins aren't measured)")
+    parser.add_argument("--json", dest="json_out", help="write results to this JSON file")
+    parser.add_argument("--compare", help="baseline JSON from a previous run")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="fractional p99 increase / throughput drop counted as a regression")
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    mix = parse_mix(args.mix)
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)
+    logging.getLogger("spotipy").setLevel(logging.CRITICAL)
+
+    with tempfile.TemporaryDirectory(prefix="tunedup-bench-") as workdir, \
+            FakeSpotifyServer(config_from_args(args, seed=args.seed)) as spotify:
+        configure_env(args, workdir, spotify.url)
+        from werkzeug.serving import make_server
+        from app import create_app
+
+        app = create_app()
+        seed(app, args.users, args.list_size, args.catalog_size, args.zipf, args.seed)
+        server = make_server("127.0.0.1", 0, app, threaded=True)
+        threading.Thread(target=server.serve_forever, name="bench-app", daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        print(f"Seeded {args.users} users x {args.list_size} items x {len(RANKING_TYPES)} lists "
+              f"(catalogue {max(args.catalog_size, args.list_size)}, zipf {args.zipf:g}); "
+              f"driving {args.concurrency} workers for {args.duration:g}s")
+
+        recorder = Recorder()
+        start = time.monotonic()
+        deadline = start + args.duration
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            futures = [pool.submit(worker, i, base, args.users, mix, deadline, recorder, args.seed)
+                       for i in range(args.concurrency)]
+            for f in futures:
+                f.result()
+        elapsed = time.monotonic() - start
+        server.shutdown()
+        spotify_counts = dict(sorted(spotify.config.counts.items()))
+
+    results = summarize(recorder, elapsed)
+    print_table(results)
+    print(f"\nFake Spotify calls: {spotify_counts}")
+    report = {
+        "meta": {"commit": _git_commit(), "args": vars(args), "elapsed_sec": round(elapsed, 2)},
+        "results": results,
+    }
+    if args.json_out:
+        with open(args.json_out, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
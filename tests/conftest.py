@@ -0,0 +1,15 @@
+import pytest
+
+from app import create_app
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite:///" + str(tmp_path / "test.db"))
+    monkeypatch.setenv("ASSETS_DIR", str(tmp_path / "assets"))
+    monkeypatch.setenv("PASSWORD_HASH_METHOD", "pbkdf2:sha256:1000")
+    app = create_app()
+    client = app.test_client()
+    client.post("/auth/register", data={"username": "u", "email": "u@example.invalid", "password": "pw"})
+    client.app = app
+    return client
@@ -0,0 +1,42 @@
+import random
+
+from app import history
+
+
+def _ids(client):
+    return {item["artist_name"]: item["id"] for item in client.get("/api/artists/").get_json()}
+
+
+def _assert_history_matches(client):
+    with client.app.app_context():
+        latest = history.latest_version("artists", 1)
+        assert history.state_at("artists", 1, latest) == history.current_names("artists", 1)
+
+
+def test_partial_reorder_then_remove_and_add(client):
+    for name in "ABCD":
+        client.post("/api/artists/", json={"artist_name": name})
+    ids = _ids(client)
+    # A partial order leaves tied rank positions behind.
+    client.put("/api/artists/reorder", json={"order": [ids["D"]]})
+    client.delete(f"/api/artists/{ids['B']}")
+    client.post("/api/artists/", json={"artist_name": "E"})
+    _assert_history_matches(client)
+
+
+def test_mixed_operations(client):
+    rng = random.Random(7)
+    for step in range(80):
+        ids = _ids(client)
+        action = rng.choice(("add", "add", "remove", "reorder", "partial"))
+        if action == "add" or not ids:
+            client.post("/api/artists/", json={"artist_name": f"artist {step}"})
+        elif action == "remove":
+            client.delete(f"/api/artists/{rng.choice(list(ids.values()))}")
+        else:
+            order = list(ids.values())
+            rng.shuffle(order)
+            if action == "partial":
+                order = order[: rng.randint(1, len(order))]
+            client.put("/api/artists/reorder", json={"order": order})
+        _assert_history_matches(client)
@@ -0,0 +1,39 @@
+import threading
+
+from app import leaderboards
+
+
+def test_reorder_if_match_conflicts_with_write_committed_mid_request(client, monkeypatch):
+    for name in "ABC":
+        client.post("/api/artists/", json={"artist_name": name})
+    listed = client.get("/api/artists/")
+    order = [item["id"] for item in reversed(listed.get_json())]
+
+    # Another tab's add commits after this reorder has read the list but before it writes.
+    other = client.application.test_client()
+    other.post("/auth/login", data={"username": "u", "password": "pw"})
+    real_apply = leaderboards.apply_changes
+
+    def apply_after_concurrent_add(kind, changes):
+        monkeypatch.setattr(leaderboards, "apply_changes", real_apply)
+        thread = threading.Thread(target=other.post, args=("/api/artists/",), kwargs={"json": {"artist_name": "X"}})
+        thread.start()
+        thread.join()
+        real_apply(kind, changes)
+
+    monkeypatch.setattr(leaderboards, "apply_changes", apply_after_concurrent_add)
+    resp = client.put("/api/artists/reorder", json={"order": order}, headers={"If-Match": listed.headers["ETag"]})
+    assert resp.status_code == 412
+    names = [item["artist_name"] for item in client.get("/api/artists/").get_json()]
+    assert names == ["A", "B", "C", "X"]
+
+
+def test_reorder_with_current_if_match(client):
+    for name in "ABC":
+        client.post("/api/artists/", json={"artist_name": name})
+    listed = client.get("/api/artists/")
+    order = [item["id"] for item in reversed(listed.get_json())]
+    resp = client.put("/api/artists/reorder", json={"order": order}, headers={"If-Match": listed.headers["ETag"]})
+    assert resp.status_code == 200
+    assert resp.headers["ETag"] == '"v4"'
+    assert [item["artist_name"] for item in client.get("/api/artists/").get_json()] == ["C", "B", "A"]